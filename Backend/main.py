@@ -1,20 +1,48 @@
 from fastapi import FastAPI
 import asyncio
-import httpx
+from contextlib import asynccontextmanager
 from routers import (
-    ai_code_assessment_routers as evaluation  
+    ai_code_assessment_routers as evaluation,
+    judge0_callback_router
 )
+from services.question_loader_service import init_question_store
+from services.solution_evaluation_service import start_execution_backends, close_execution_backends
+from services.evaluation_job_service import job_store
+from services import feedback_cache_service
+from utils.http_client import init_http_clients, close_http_clients, get_http_client
+from utils import metrics
+from utils.key_rotator import start_key_reload, stop_key_reload
 from exception_handler import add_exception_handlers
 from dotenv import load_dotenv
 
 
 load_dotenv()
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Parse the question bank once so requests only do in-memory lookups
+    await init_question_store()
+    # One pooled client per upstream, reused by every outbound call until shutdown
+    await init_http_clients("judge0", "default")
+    # Pre-fork the local runner's warm interpreters when local execution is enabled
+    await start_execution_backends()
+    # API keys can be added or retired in .env while the server runs
+    start_key_reload()
+    yield
+    await stop_key_reload()
+    # Cancel background evaluations before the clients and runners they use go away
+    await job_store.close()
+    await close_execution_backends()
+    feedback_cache_service.close()
+    await close_http_clients()
+
 app = FastAPI(
     title="AI Code Assessment App",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 app.include_router(evaluation.router)
+app.include_router(judge0_callback_router.router)
 add_exception_handlers(app)
 
 @app.get("/")
@@ -23,13 +51,16 @@ async def root():
 @app.get("/healthz")
 async def health_check():
     return {"status": "ok"}
+@app.get("/metrics")
+async def get_metrics():
+    # Counters and upstream state (API key pools, ...) for dashboards and debugging
+    return metrics.snapshot()
 async def self_ping_task():
     await asyncio.sleep(60)  # initial delay
     url = "https://aicodeassessment-backend.onrender.com/healthz"
     while True:
         try:
-            async with httpx.AsyncClient() as client:
-                await client.get(url, timeout=5)
+            await get_http_client().get(url, timeout=5)
         except Exception:
             pass
         await asyncio.sleep(600)  # ping every 10 minutes
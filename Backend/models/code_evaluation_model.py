@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import List, Literal, Optional
 
 # This module defines the data models used for code evaluation and submission.
 #
@@ -20,6 +20,11 @@ class Question(BaseModel):
     #constraints: str
     examples: List[Example]
     difficultylevel: str
+    # Optional per-question resource profile (Judge0 units: seconds and KB);
+    # anything left unset falls back to the defaults for the question's difficulty
+    cpu_time_limit: Optional[float] = None
+    wall_time_limit: Optional[float] = None
+    memory_limit: Optional[int] = None
     
 
 class CodeSubmission(BaseModel):
@@ -29,6 +34,10 @@ class CodeSubmission(BaseModel):
     language_id: int
     # The ID of the question the code is submitted for
     question_id: int
+    # Optional candidate identifier, used to run the tests this candidate failed last time first
+    candidate_id: Optional[str] = None
+    # "full" runs every test case; "fail_fast" stops at the first failing one (pass/fail screening)
+    evaluation_mode: Literal["full", "fail_fast"] = "full"
    
 class EvaluationResult(BaseModel):
     # This class represents the result of an evaluation
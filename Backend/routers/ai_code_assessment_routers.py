@@ -1,8 +1,11 @@
 # Backend/routers/ai_code_assessment_routers.py - Simplified dynamic generation
 
-from fastapi import APIRouter, HTTPException, Query
+import json
+from fastapi import APIRouter, Header, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from models.code_evaluation_model import CodeSubmission, EvaluationResult
 from services import code_assessment_service
+from services.evaluation_job_service import JobQueueFullError, evaluation_response, job_response, job_store
 from services.gemini_evaluation_service import evaluate_code_with_gemini
 from logging_config import logger
 
@@ -50,15 +53,7 @@ async def evaluate_code(submission: CodeSubmission):
         print("contoller is called",flush=True)       
         result= await code_assessment_service.evaluate_submission(submission)     
         
-        return {
-            "correct": result.correct,
-            "expected": result.expected,
-            "actual": result.actual,
-            "status": result.status,
-            "feedback": result.feedback,           
-            "has_ai_feedback": result.feedback is not None,
-            "judge0_response": result.full_judge_response
-        }
+        return evaluation_response(result)
         
     except ValueError as e:
         logger.error(f"Validation error in evaluate_code: {e}")
@@ -67,6 +62,60 @@ async def evaluate_code(submission: CodeSubmission):
         logger.error(f"Unexpected error in evaluate_code: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Code evaluation failed: {str(e)}")
 
+@router.post("/evaluations", status_code=202)
+async def submit_evaluation(submission: CodeSubmission, stream: bool = Query(False)):
+    """
+    Start evaluating submitted code in the background; poll the returned status_url for the result.
+    With stream=true the test cases run in chunks so events_url reports each one as it finishes.
+    """
+    try:
+        job = job_store.submit(
+            submission, code_assessment_service.execute_submission, code_assessment_service.generate_feedback,
+            stream=stream
+        )
+    except JobQueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    logger.info(f"Queued evaluation job {job.id} for question {submission.question_id}")
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "status_url": f"{router.prefix}/evaluations/{job.id}",
+        "events_url": f"{router.prefix}/evaluations/{job.id}/events"
+    }
+
+@router.get("/evaluations/{job_id}")
+async def get_evaluation(job_id: str):
+    """Status of an evaluation job, with the result once it has finished"""
+    job = job_store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Evaluation {job_id} not found or expired")
+    return job_response(job)
+
+@router.get("/evaluations/{job_id}/events")
+async def stream_evaluation_events(job_id: str, last_event_id: int = Header(0)):
+    """
+    Server-Sent Events for an evaluation job: "status", "test_case" (queued / running / finished /
+    skipped, with the result row once finished), "result", "feedback", and a final "done".
+    Reconnecting clients send Last-Event-ID and only receive what they missed.
+    """
+    job = job_store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Evaluation {job_id} not found or expired")
+
+    async def event_source():
+        async for event in job.stream(after=last_event_id):
+            if event is None:
+                yield ": keep-alive\n\n"
+                continue
+            yield f"id: {event['id']}\nevent: {event['event']}\ndata: {json.dumps(event['data'])}\n\n"
+
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        # Keep proxies (nginx) from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.get("/question/{question_id}")
 async def get_question_by_id(question_id: int):
     """Get current question by ID"""
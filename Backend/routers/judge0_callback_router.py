@@ -0,0 +1,34 @@
+# Backend/routers/judge0_callback_router.py - Internal endpoint Judge0 calls when a submission finishes
+
+import hmac
+from fastapi import APIRouter, HTTPException, Query, Request
+from services import judge0_callback_service
+from services.judge0_callback_service import JUDGE0_CALLBACK_SECRET
+from logging_config import logger
+
+router = APIRouter(
+    prefix="/internal/judge0",
+    tags=["Internal"],
+    include_in_schema=False
+)
+
+@router.put("/callback")
+async def judge0_callback(request: Request, secret: str = Query(None)):
+    """Receive a finished submission from Judge0 and wake up the request waiting for it"""
+    if not JUDGE0_CALLBACK_SECRET:
+        # Callback mode is off without a secret; nobody may feed results in
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not hmac.compare_digest((secret or "").encode(), JUDGE0_CALLBACK_SECRET.encode()):
+        raise HTTPException(status_code=403, detail="Invalid callback secret")
+    try:
+        payload = await request.json()
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid JSON body")
+
+    token = payload.get("token")
+    if not token:
+        raise HTTPException(status_code=400, detail="Missing submission token")
+
+    delivered = judge0_callback_service.resolve(token, payload)
+    logger.info(f"Judge0 callback for {token} (waiting request: {delivered})")
+    return {"status": "ok"}
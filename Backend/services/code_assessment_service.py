@@ -1,18 +1,38 @@
 # load_and_evaluation_service.py
 
-from typing import List, Optional
+from typing import Callable, Dict, List, Optional
 from models.code_evaluation_model import Question, CodeSubmission, EvaluationResult
-from services.solution_evaluation_service import evaluate_code
+from services.solution_evaluation_service import evaluate_code_batch
 from services.question_loader_service import (    
     get_question_by_id as csv_get_question_by_id,
     get_random_question as csv_get_random_question,
     get_questions_by_difficulty as csv_get_questions_by_difficulty,
     get_all_questions as csv_get_all_questions   
 )
-from services.feedback_to_recuriter import generate_recruiter_feedback
+from services.feedback_to_recuriter import generate_recruiter_feedback, build_recruiter_feedback
+from services.syntax_check_service import check_syntax
+from services import test_ordering_service
+from services.resource_limits import limits_for_question, execution_deadline
+from utils.metrics import increment, register_provider
+from utils.output import truncate_output, stdout_digest
 from logging_config import logger
+import asyncio
+import os
 import time
 
+# Fail-fast mode runs test cases in waves (1, 2, 4, ... by default) and stops after the
+# first wave with a failure: one execution for most broken submissions, few round trips otherwise
+FAIL_FAST_FIRST_WAVE = int(os.getenv("FAIL_FAST_FIRST_WAVE", "1"))
+# Full runs execute as one batch. Evaluations submitted with stream=true are split into concurrent
+# chunks of this many test cases so each is reported as soon as it finishes, at the cost of one
+# execution (Judge0 batch, harness run) per chunk; 0 keeps those in one batch as well
+STREAM_CHUNK_SIZE = int(os.getenv("STREAM_CHUNK_SIZE", "1"))
+
+# progress(event, data): per test case "test_case" events with status queued / running / finished / skipped
+ProgressCallback = Callable[[str, dict], None]
+
+register_provider("test_ordering", test_ordering_service.snapshot)
+
 # Use CSV-based question loading functions
 # Define an asynchronous function called get_random_question that takes an optional parameter difficulty of type str
 # and returns an optional Question object
@@ -47,8 +67,155 @@ def get_language_name(language_id: int) -> str:
     }
     return language_map.get(language_id, "Python") 
 
+def _actual_digest(execution_result: dict) -> str:
+    # Backends hash the full stdout before capping it; the kept stdout is only a fallback
+    return execution_result.get("stdout_sha256") or stdout_digest(execution_result.get("stdout"))
+
+def _passed(example, execution_result: dict) -> bool:
+    return _actual_digest(execution_result) == stdout_digest(example.output)
+
+def test_case_row(example, execution_result: dict) -> dict:
+    """Reported result of one executed example."""
+    stdout = (execution_result.get("stdout") or "").strip()
+    # Compared on the full output's hash, only a bounded preview (plus that hash) leaves this module
+    return {
+        "input": example.input,
+        "expected": example.output.strip(),
+        "actual": truncate_output(stdout),
+        "actual_sha256": _actual_digest(execution_result),
+        "status": "Passed" if _passed(example, execution_result) else "Failed",
+        "error": truncate_output(execution_result.get("stderr") or execution_result.get("compile_output") or "")
+    }
+
+def _report(progress: Optional[ProgressCallback], idx: int, status: str, row: Optional[dict] = None) -> None:
+    if progress is not None:
+        progress("test_case", {"index": idx, "status": status, "result": row})
+
+async def run_test_cases(submission: CodeSubmission, question: Question, order: List[int],
+                         progress: Optional[ProgressCallback] = None,
+                         stream: bool = False) -> Dict[int, dict]:
+    """
+    Execute the question's examples in the given order; returns example index -> result.
+    In fail_fast mode examples run in growing waves and later waves are skipped after a failure.
+    progress, when given, is told as each example is queued, starts running and finishes;
+    stream runs full evaluations in chunks so those events arrive as each chunk finishes.
+    """
+    stdins = {idx: question.examples[idx].input.strip() for idx in order}
+    # The question's resource profile bounds every run, and how long we wait for a round of them
+    limits = limits_for_question(question, submission.language_id)
+    deadline = execution_deadline(limits)
+    # Lets the local runner stop a program at the first byte that cannot match
+    expected = {idx: question.examples[idx].output for idx in order}
+    for idx in order:
+        _report(progress, idx, "queued")
+
+    async def run_batch(batch: List[int]) -> List[dict]:
+        for idx in batch:
+            _report(progress, idx, "running")
+        batch_results = await evaluate_code_batch(
+            code=submission.code,
+            language_id=submission.language_id,
+            stdins=[stdins[idx] for idx in batch],
+            limits=limits,
+            deadline=deadline,
+            expected_outputs=[expected[idx] for idx in batch]
+        )
+        for idx, result in zip(batch, batch_results):
+            _report(progress, idx, "finished", test_case_row(question.examples[idx], result))
+        return batch_results
+
+    if submission.evaluation_mode != "fail_fast":
+        if not stream or STREAM_CHUNK_SIZE <= 0:
+            # Submit every test case in one Judge0 batch instead of one round trip per example
+            return dict(zip(order, await run_batch(order)))
+        size = STREAM_CHUNK_SIZE
+        chunks = [order[i:i + size] for i in range(0, len(order), size)]
+        chunk_results = await asyncio.gather(*(run_batch(chunk) for chunk in chunks))
+        return {idx: result for chunk, batch_results in zip(chunks, chunk_results) for idx, result in zip(chunk, batch_results)}
+
+    results: Dict[int, dict] = {}
+    position, wave = 0, max(1, FAIL_FAST_FIRST_WAVE)
+    while position < len(order):
+        batch = order[position:position + wave]
+        wave_results = await run_batch(batch)
+        results.update(zip(batch, wave_results))
+        if not all(_passed(question.examples[idx], result) for idx, result in zip(batch, wave_results)):
+            break
+        position += len(batch)
+        wave *= 2
+    return results
+
+def syntax_error_result(question: Question, language_name: str, diagnostics: str, total_time: str) -> EvaluationResult:
+    """Compilation error result built from local diagnostics, with feedback composed without AI."""
+    diagnostics = truncate_output(diagnostics)
+    test_case_results = [{
+        "input": example.input,
+        "expected": example.output.strip(),
+        "actual": "",
+        "actual_sha256": None,
+        "status": "Failed",
+        "error": diagnostics
+    } for example in question.examples]
+    feedback = build_recruiter_feedback(
+        language=language_name,
+        judge_result={
+            "status": "Failed",
+            "stderr": "",
+            "compile_output": diagnostics,
+            "stdout": "",
+            "time": total_time,
+            "memory": 0,
+            "passed": 0,
+            "total": len(question.examples),
+            "edge_cases_handled": False
+        },
+        expected_outputs=[ex.output for ex in question.examples],
+        time_taken=total_time,
+        attempts=["Attempt 1", "Attempt 2", "Attempt 3"],
+        ai_feedback={
+            "completion_status": "Does not compile",
+            "critical_errors": [diagnostics.splitlines()[-1] if diagnostics else "Syntax error"],
+            "ai_observations": ["The submission has a syntax error, so no test case was run."],
+            "improvement_suggestions": ["Fix the syntax error reported in the compile output and resubmit."]
+        }
+    )
+    return EvaluationResult(
+        correct=False,
+        expected="\n".join([ex.output for ex in question.examples]),
+        actual="",
+        status="Failed",
+        feedback=feedback,
+        full_judge_response={"results": test_case_results, "compile_output": diagnostics}
+    )
+
+class ExecutionOutcome:
+    """
+    First phase of an evaluation: the test case results, available as soon as execution ends,
+    plus the arguments for generate_recruiter_feedback. feedback_request is None when the
+    result's feedback is already final (e.g. built locally for a syntax error).
+    """
+
+    def __init__(self, result: EvaluationResult, feedback_request: Optional[dict] = None):
+        self.result = result
+        self.feedback_request = feedback_request
+
 # Define an asynchronous function to evaluate a code submission
 async def evaluate_submission(submission: CodeSubmission) -> EvaluationResult:
+    """Both phases: execution results with the AI feedback attached."""
+    outcome = await execute_submission(submission)
+    outcome.result.feedback = await generate_feedback(outcome)
+    return outcome.result
+
+async def generate_feedback(outcome: ExecutionOutcome) -> dict:
+    """Second phase: the recruiter feedback, waiting on Gemini."""
+    if outcome.feedback_request is None:
+        return outcome.result.feedback
+    return await generate_recruiter_feedback(**outcome.feedback_request)
+
+async def execute_submission(submission: CodeSubmission,
+                             progress: Optional[ProgressCallback] = None,
+                             stream: bool = False) -> ExecutionOutcome:
+    """First phase: run the test cases; the returned result has no feedback yet."""
     try:
         logger.info("Evaluating submission")
         print("Evaluating submission")
@@ -65,30 +232,57 @@ async def evaluate_submission(submission: CodeSubmission) -> EvaluationResult:
 
         start_time = time.perf_counter()
 
+        # Code that does not even parse never reaches Judge0 or Gemini
+        diagnostics = await check_syntax(submission.code, submission.language_id)
+        if diagnostics is not None:
+            increment("syntax_precheck_rejections")
+            logger.info(f"Submission rejected by the local syntax check: {diagnostics.splitlines()[-1] if diagnostics else ''}")
+            return ExecutionOutcome(syntax_error_result(
+                question, language_name, diagnostics, f"{round(time.perf_counter() - start_time, 2)}s"
+            ))
+
+        # Most likely failures first: this candidate's last failures, then the question's usual suspects
+        order = test_ordering_service.order_test_cases(
+            question.id, len(question.examples), submission.candidate_id
+        )
+        execution_results = await run_test_cases(submission, question, order, progress, stream)
+        outcomes = {}
+
         for idx, example in enumerate(question.examples):
-            logger.info(f"Running test case {idx + 1}: {example.input.strip()}")
-            print(f"Running test case {idx + 1}: {example.input.strip()}")
-            execution_result = await evaluate_code(
-                code=submission.code,
-                language_id=submission.language_id,
-                stdin=example.input.strip()
-            )
-            print(f"Execution result: {execution_result}")
-            stdout = (execution_result.get("stdout") or "").strip()
+            execution_result = execution_results.get(idx)
             expected = example.output.strip()
+            if execution_result is None:
+                # Not executed: fail-fast mode stopped at an earlier failure
+                actual_outputs.append("")
+                row = {
+                    "input": example.input,
+                    "expected": expected,
+                    "actual": "",
+                    "actual_sha256": None,
+                    "status": "Skipped",
+                    "error": ""
+                }
+                test_case_results.append(row)
+                _report(progress, idx, "skipped", row)
+                continue
 
-            is_passed = stdout == expected
+            logger.info(f"Test case {idx + 1}: {example.input.strip()}")
+            print(f"Execution result status: {execution_result.get('status')}")
+            row = test_case_row(example, execution_result)
+
+            is_passed = row["status"] == "Passed"
+            outcomes[idx] = is_passed
             if is_passed:
                 passed_count += 1
 
-            actual_outputs.append(stdout)
-            test_case_results.append({
-                "input": example.input,
-                "expected": expected,
-                "actual": stdout,
-                "status": "Passed" if is_passed else "Failed",
-                "error": execution_result.get("stderr") or execution_result.get("compile_output") or ""
-            })
+            actual_outputs.append(row["actual"])
+            test_case_results.append(row)
+
+        test_ordering_service.record_results(question.id, outcomes, submission.candidate_id)
+        skipped = len(question.examples) - len(outcomes)
+        if skipped:
+            increment("test_cases_skipped", skipped)
+            logger.info(f"Fail-fast: skipped {skipped} of {len(question.examples)} test cases")
 
         end_time = time.perf_counter()
         total_time = f"{round(end_time - start_time, 2)}s"
@@ -96,7 +290,7 @@ async def evaluate_submission(submission: CodeSubmission) -> EvaluationResult:
         correctness = passed_count == len(question.examples)
         edge_cases_flag = passed_count == len(question.examples) and len(question.examples) > 2
 
-        feedback = await generate_recruiter_feedback(
+        feedback_request = dict(
             code=submission.code,
             language=language_name,
             question_description=question.description,
@@ -114,18 +308,20 @@ async def evaluate_submission(submission: CodeSubmission) -> EvaluationResult:
             expected_outputs=[ex.output for ex in question.examples],
             actual_output="\n".join(actual_outputs),
             time_taken=total_time,
-            attempts=["Attempt 1", "Attempt 2", "Attempt 3"]
+            attempts=["Attempt 1", "Attempt 2", "Attempt 3"],
+            question_id=question.id,
+            test_statuses=[row["status"] for row in test_case_results]
         )
 
-        logger.info("Submission evaluation complete")
-        return EvaluationResult(
+        logger.info("Submission execution complete")
+        return ExecutionOutcome(EvaluationResult(
             correct=correctness,
             expected="\n".join([ex.output for ex in question.examples]),
             actual="\n".join(actual_outputs),
             status="Passed" if correctness else "Failed",
-            feedback=feedback,
+            feedback=None,
             full_judge_response={"results": test_case_results}
-        )
+        ), feedback_request)
 
     except Exception as e:
         logger.error(f"Evaluation failed: {e}", exc_info=True)
@@ -0,0 +1,214 @@
+# services/compilation_service.py
+#
+# Compile once, run many: toolchain definitions for the compiled languages and a cache of
+# build artifacts keyed by a hash of the source, so a submission is compiled a single time
+# no matter how many test cases it runs against (and an identical resubmission not at all).
+
+import asyncio
+import hashlib
+import os
+import shutil
+import tempfile
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional
+from dotenv import load_dotenv
+from logging_config import logger
+from utils.metrics import increment
+
+load_dotenv()
+
+# Where build artifacts live and how many submissions are kept (least recently used are removed)
+LOCAL_ARTIFACT_DIR = os.getenv("LOCAL_ARTIFACT_DIR", os.path.join(tempfile.gettempdir(), "code-artifacts"))
+LOCAL_ARTIFACT_CACHE_SIZE = int(os.getenv("LOCAL_ARTIFACT_CACHE_SIZE", "64"))
+# Compile errors remembered per source hash, for backends that cannot keep artifacts (Judge0)
+COMPILE_FAILURE_CACHE_SIZE = int(os.getenv("COMPILE_FAILURE_CACHE_SIZE", "256"))
+
+# Judge0 language ids of the compiled languages.
+# "compile" and "run" are argv templates: {dir} is the artifact directory, {memory_mb} the
+# run's memory limit. Managed runtimes reserve far more address space than they use, so
+# they get no RLIMIT_AS and have their heap capped by the runtime flag instead.
+COMPILED_LANGUAGES: Dict[int, dict] = {
+    50: {
+        "name": "C",
+        "source": "main.c",
+        "compile": ["gcc", "-O2", "-std=c11", "-pipe", "-o", "main", "main.c", "-lm"],
+        "run": ["{dir}/main"],
+        "address_space_limit": True
+    },
+    54: {
+        "name": "C++",
+        "source": "main.cpp",
+        "compile": ["g++", "-O2", "-std=c++17", "-pipe", "-o", "main", "main.cpp"],
+        "run": ["{dir}/main"],
+        "address_space_limit": True
+    },
+    62: {
+        "name": "Java",
+        "source": "Main.java",
+        "compile": ["javac", "-encoding", "UTF-8", "Main.java"],
+        "run": ["java", "-Xmx{memory_mb}m", "-Xss64m", "-cp", "{dir}", "Main"],
+        "address_space_limit": False
+    },
+    51: {
+        "name": "C#",
+        "source": "main.cs",
+        "compile": ["mcs", "-optimize+", "-out:main.exe", "main.cs"],
+        "run": ["mono", "{dir}/main.exe"],
+        "address_space_limit": False
+    },
+}
+
+
+def is_compiled_language(language_id: int) -> bool:
+    return language_id in COMPILED_LANGUAGES
+
+
+def source_hash(code: str, language_id: int) -> str:
+    return hashlib.sha256(f"{language_id}\0{code}".encode("utf-8")).hexdigest()
+
+
+def toolchain_available(language_id: int) -> bool:
+    """True when the compiler and the runtime for a language are installed on this host."""
+    spec = COMPILED_LANGUAGES.get(language_id)
+    if spec is None:
+        return False
+    programs = {spec["compile"][0], spec["run"][0]}
+    return all(shutil.which(p) for p in programs if not p.startswith("{dir}"))
+
+
+def resolve_argv(template: list, directory: str, memory_kb: int = 0) -> list:
+    """Fill in an argv template; the program is resolved to an absolute path since the sandbox PATH is minimal."""
+    argv = [part.format(dir=directory, memory_mb=max(16, memory_kb // 1024)) for part in template]
+    if not os.path.isabs(argv[0]):
+        argv[0] = shutil.which(argv[0]) or argv[0]
+    return argv
+
+
+class CompiledArtifact:
+    """Outcome of compiling one source: a directory holding the build output, or the compiler's errors."""
+
+    def __init__(self, key: str, language_id: int, directory: str, ok: bool, compile_output: str = ""):
+        self.key = key
+        self.language_id = language_id
+        self.directory = directory
+        self.ok = ok
+        self.compile_output = compile_output
+
+    def run_argv(self, memory_kb: int) -> list:
+        return resolve_argv(COMPILED_LANGUAGES[self.language_id]["run"], self.directory, memory_kb)
+
+
+# Compiles the source in a prepared directory; returns (ok, compiler output)
+CompileFunc = Callable[[int, str], Awaitable[tuple]]
+
+
+class ArtifactCache:
+    """
+    LRU cache of compiled submissions. Concurrent requests for the same source share
+    one compilation; failed compilations are cached too so they are reported instantly.
+    """
+
+    def __init__(self, max_entries: int = LOCAL_ARTIFACT_CACHE_SIZE, root: str = LOCAL_ARTIFACT_DIR):
+        self.max_entries = max(1, max_entries)
+        self.root = root
+        self._entries: "OrderedDict[str, CompiledArtifact]" = OrderedDict()
+        self._pending: Dict[str, asyncio.Future] = {}
+
+    async def get_or_compile(self, code: str, language_id: int, compile_fn: CompileFunc) -> CompiledArtifact:
+        key = source_hash(code, language_id)
+        artifact = self._entries.get(key)
+        if artifact is not None:
+            self._entries.move_to_end(key)
+            increment("compile_cache_hits")
+            return artifact
+        if key in self._pending:
+            increment("compile_cache_hits")
+            return await asyncio.shield(self._pending[key])
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending[key] = future
+        try:
+            artifact = await self._compile(key, code, language_id, compile_fn)
+            self._store(artifact)
+            future.set_result(artifact)
+            return artifact
+        except BaseException as e:
+            future.set_exception(e)
+            # Nobody else may be waiting on it; don't warn about an unretrieved exception
+            future.exception()
+            raise
+        finally:
+            del self._pending[key]
+
+    async def _compile(self, key: str, code: str, language_id: int, compile_fn: CompileFunc) -> CompiledArtifact:
+        increment("compile_cache_misses")
+        spec = COMPILED_LANGUAGES[language_id]
+        os.makedirs(self.root, exist_ok=True)
+        directory = tempfile.mkdtemp(prefix=f"{key[:16]}-", dir=self.root)
+        with open(os.path.join(directory, spec["source"]), "w", encoding="utf-8") as f:
+            f.write(code)
+        try:
+            ok, output = await compile_fn(language_id, directory)
+        except BaseException:
+            shutil.rmtree(directory, ignore_errors=True)
+            raise
+        if not ok:
+            # Only the error text is needed from a failed build
+            shutil.rmtree(directory, ignore_errors=True)
+        else:
+            self._seal(directory)
+        logger.info(f"Compiled {spec['name']} submission {key[:12]}: {'ok' if ok else 'compilation error'}")
+        return CompiledArtifact(key, language_id, directory, ok, output)
+
+    @staticmethod
+    def _seal(directory: str) -> None:
+        """
+        Take the build back from the sandbox user that compiled it, so runs (which also see the
+        directory through a read-only bind) cannot change the artifact every later run executes.
+        """
+        if os.getuid() != 0:
+            return
+        for path, _, files in os.walk(directory):
+            os.chown(path, 0, 0)
+            os.chmod(path, 0o755)
+            for name in files:
+                target = os.path.join(path, name)
+                os.chown(target, 0, 0)
+                # Readable (and executable when built as such) by everyone, writable by nobody but root
+                os.chmod(target, 0o755 if os.stat(target).st_mode & 0o100 else 0o644)
+
+    def _store(self, artifact: CompiledArtifact) -> None:
+        self._entries[artifact.key] = artifact
+        while len(self._entries) > self.max_entries:
+            _, evicted = self._entries.popitem(last=False)
+            if evicted.ok:
+                shutil.rmtree(evicted.directory, ignore_errors=True)
+
+    def snapshot(self) -> dict:
+        return {"entries": len(self._entries), "compiling": len(self._pending), "max_entries": self.max_entries}
+
+    def clear(self) -> None:
+        for artifact in self._entries.values():
+            if artifact.ok:
+                shutil.rmtree(artifact.directory, ignore_errors=True)
+        self._entries.clear()
+
+
+class CompileFailureCache:
+    """Remembers compilation error results by source hash for backends that compile remotely."""
+
+    def __init__(self, max_entries: int = COMPILE_FAILURE_CACHE_SIZE):
+        self.max_entries = max(1, max_entries)
+        self._entries: "OrderedDict[str, dict]" = OrderedDict()
+
+    def get(self, code: str, language_id: int) -> Optional[dict]:
+        key = source_hash(code, language_id)
+        result = self._entries.get(key)
+        if result is not None:
+            self._entries.move_to_end(key)
+        return result
+
+    def put(self, code: str, language_id: int, result: dict) -> None:
+        self._entries[source_hash(code, language_id)] = result
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
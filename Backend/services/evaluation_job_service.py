@@ -0,0 +1,242 @@
+# services/evaluation_job_service.py
+#
+# Background evaluation jobs: POST /evaluations answers with a job id straight away and the
+# pipeline runs here, off the request. Clients poll GET /evaluations/{id} for the outcome.
+# Jobs run in two phases: the test results are published on the record as soon as execution
+# finishes ("executed"), and the AI feedback is attached to the same record when Gemini answers.
+# Every step is also appended to the job's event log, which GET /evaluations/{id}/events
+# streams as Server-Sent Events (per test case progress, results, feedback).
+# Jobs live in process memory, so with several workers a client must reach the same one
+# (single worker or sticky sessions).
+
+import asyncio
+import os
+import time
+import uuid
+from datetime import datetime
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+from dotenv import load_dotenv
+from logging_config import logger
+from models.code_evaluation_model import CodeSubmission, EvaluationResult
+from utils.metrics import increment, register_provider
+
+load_dotenv()
+
+# Evaluations executing at once; further jobs wait in the queue (feedback generation is not counted)
+EVALUATION_JOB_CONCURRENCY = int(os.getenv("EVALUATION_JOB_CONCURRENCY", "16"))
+# Unfinished jobs accepted before new submissions are refused (HTTP 503)
+EVALUATION_JOB_MAX_PENDING = int(os.getenv("EVALUATION_JOB_MAX_PENDING", "500"))
+# How long a finished job can still be fetched
+EVALUATION_JOB_TTL_SECONDS = float(os.getenv("EVALUATION_JOB_TTL_SECONDS", "3600"))
+# Idle seconds after which an event stream sends a keep-alive comment (proxies drop silent connections)
+EVALUATION_EVENTS_HEARTBEAT_SECONDS = float(os.getenv("EVALUATION_EVENTS_HEARTBEAT_SECONDS", "15"))
+
+QUEUED = "queued"
+RUNNING = "running"
+# Test results are available, the AI feedback is still being generated
+EXECUTED = "executed"
+COMPLETED = "completed"
+FAILED = "failed"
+
+# feedback_status values
+FEEDBACK_PENDING = "pending"
+FEEDBACK_READY = "ready"
+FEEDBACK_FAILED = "failed"
+
+# Phase one gets the submission, a progress(event, data) callback and the job's stream flag (the
+# client asked for test results as they finish), and returns an object with a .result
+# (EvaluationResult without feedback); phase two turns that object into the feedback dict
+Executor = Callable[[CodeSubmission, Callable[[str, dict], None], bool], Awaitable[Any]]
+FeedbackGenerator = Callable[[Any], Awaitable[Optional[dict]]]
+
+
+class JobQueueFullError(Exception):
+    """Too many evaluations are already waiting."""
+
+
+class EvaluationJob:
+    """One submitted evaluation and its progress."""
+
+    def __init__(self, submission: CodeSubmission, stream: bool = False):
+        self.id = uuid.uuid4().hex
+        self.submission = submission
+        # Run the tests in chunks so their results can be streamed as they finish
+        self.streaming = stream
+        self.status = QUEUED
+        self.created_at = datetime.utcnow().isoformat()
+        self.started_at: Optional[str] = None
+        self.finished_at: Optional[str] = None
+        # Monotonic completion time, for expiry
+        self.finished_monotonic: Optional[float] = None
+        self.result: Optional[EvaluationResult] = None
+        self.feedback_status = FEEDBACK_PENDING
+        self.error: Optional[str] = None
+        # 400 for invalid submissions, 500 for failures of the pipeline itself
+        self.error_code: Optional[int] = None
+        # Event log: {"id", "event", "data"} with ids counting from 1
+        self.events: List[dict] = []
+        # Replaced after every publish so waiting streams wake up
+        self._updated = asyncio.Event()
+        self.publish("status", {"status": self.status})
+
+    def done(self) -> bool:
+        return self.status in (COMPLETED, FAILED)
+
+    def publish(self, event: str, data: dict) -> None:
+        self.events.append({"id": len(self.events) + 1, "event": event, "data": data})
+        updated, self._updated = self._updated, asyncio.Event()
+        updated.set()
+
+    def set_status(self, status: str) -> None:
+        self.status = status
+        self.publish("status", {"status": status})
+
+    async def stream(self, after: int = 0,
+                     heartbeat_seconds: float = EVALUATION_EVENTS_HEARTBEAT_SECONDS) -> AsyncIterator[Optional[dict]]:
+        """
+        Events with an id above `after` (replay for reconnecting clients), then live ones
+        until the job is done. Yields None when nothing happened for heartbeat_seconds.
+        """
+        while True:
+            updated = self._updated
+            while after < len(self.events):
+                after += 1
+                yield self.events[after - 1]
+            if self.done():
+                return
+            try:
+                await asyncio.wait_for(updated.wait(), timeout=heartbeat_seconds)
+            except asyncio.TimeoutError:
+                yield None
+
+
+def evaluation_response(result: EvaluationResult) -> dict:
+    """API representation of an evaluation result."""
+    return {
+        "correct": result.correct,
+        "expected": result.expected,
+        "actual": result.actual,
+        "status": result.status,
+        "feedback": result.feedback,
+        "has_ai_feedback": result.feedback is not None,
+        "judge0_response": result.full_judge_response
+    }
+
+
+def job_response(job: EvaluationJob) -> dict:
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+        # Present from the "executed" status on; "feedback" stays null until feedback_status is "ready"
+        "result": evaluation_response(job.result) if job.result is not None else None,
+        "feedback_status": job.feedback_status,
+        "error": job.error,
+        "error_code": job.error_code
+    }
+
+
+class EvaluationJobStore:
+    def __init__(self, concurrency: int = EVALUATION_JOB_CONCURRENCY,
+                 max_pending: int = EVALUATION_JOB_MAX_PENDING,
+                 ttl_seconds: float = EVALUATION_JOB_TTL_SECONDS):
+        self.max_pending = max(1, max_pending)
+        self.ttl_seconds = ttl_seconds
+        self._semaphore = asyncio.Semaphore(max(1, concurrency))
+        self._jobs: Dict[str, EvaluationJob] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    def _prune(self) -> None:
+        now = time.monotonic()
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.finished_monotonic is not None and now - job.finished_monotonic > self.ttl_seconds
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def submit(self, submission: CodeSubmission, execute: Executor, feedback: FeedbackGenerator,
+               stream: bool = False) -> EvaluationJob:
+        """Register a job and start running it in the background."""
+        self._prune()
+        if len(self._tasks) >= self.max_pending:
+            increment("evaluation_jobs_rejected")
+            raise JobQueueFullError(f"{len(self._tasks)} evaluations are already pending, try again shortly")
+        job = EvaluationJob(submission, stream)
+        self._jobs[job.id] = job
+        self._tasks[job.id] = asyncio.create_task(self._run(job, execute, feedback))
+        increment("evaluation_jobs_submitted")
+        return job
+
+    def get(self, job_id: str) -> Optional[EvaluationJob]:
+        self._prune()
+        return self._jobs.get(job_id)
+
+    async def _run(self, job: EvaluationJob, execute: Executor, feedback: FeedbackGenerator) -> None:
+        try:
+            outcome = await self._execute(job, execute)
+            if outcome is None:
+                return
+            # The execution slot is released: waiting on Gemini must not hold back other candidates' runs
+            try:
+                job.result.feedback = await feedback(outcome)
+                job.feedback_status = FEEDBACK_READY
+            except Exception as e:
+                job.feedback_status = FEEDBACK_FAILED
+                logger.error(f"Feedback for evaluation job {job.id} failed: {e}", exc_info=True)
+            job.publish("feedback", {"feedback_status": job.feedback_status, "feedback": job.result.feedback})
+            job.status = COMPLETED
+            increment("evaluation_jobs_completed")
+        finally:
+            if not job.done():
+                # Cancelled at shutdown; results already published stay valid without feedback
+                if job.result is not None:
+                    job.status = COMPLETED
+                else:
+                    job.status, job.error, job.error_code = FAILED, "Evaluation was cancelled", 500
+            if job.feedback_status == FEEDBACK_PENDING:
+                job.feedback_status = FEEDBACK_FAILED
+            job.finished_at = datetime.utcnow().isoformat()
+            job.finished_monotonic = time.monotonic()
+            self._tasks.pop(job.id, None)
+            # Final state, closes every event stream
+            job.publish("done", job_response(job))
+
+    async def _execute(self, job: EvaluationJob, execute: Executor) -> Optional[Any]:
+        async with self._semaphore:
+            job.started_at = datetime.utcnow().isoformat()
+            job.set_status(RUNNING)
+            try:
+                outcome = await execute(job.submission, job.publish, job.streaming)
+            except ValueError as e:
+                job.status, job.error, job.error_code = FAILED, str(e), 400
+                increment("evaluation_jobs_failed")
+                logger.error(f"Validation error in evaluation job {job.id}: {e}")
+                return None
+            except Exception as e:
+                job.status, job.error, job.error_code = FAILED, f"Code evaluation failed: {e}", 500
+                increment("evaluation_jobs_failed")
+                logger.error(f"Evaluation job {job.id} failed: {e}", exc_info=True)
+                return None
+        job.result = outcome.result
+        job.publish("result", evaluation_response(job.result))
+        job.set_status(EXECUTED)
+        return outcome
+
+    async def close(self) -> None:
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def snapshot(self) -> dict:
+        statuses = {QUEUED: 0, RUNNING: 0, EXECUTED: 0, COMPLETED: 0, FAILED: 0}
+        for job in self._jobs.values():
+            statuses[job.status] += 1
+        return {**statuses, "max_pending": self.max_pending}
+
+
+job_store = EvaluationJobStore()
+register_provider("evaluation_jobs", job_store.snapshot)
@@ -0,0 +1,82 @@
+# services/execution_backend.py
+#
+# Interface every code execution backend implements (Judge0, local sandbox, ...).
+# Results use the cleaned Judge0 shape produced by validate_and_clean_judge0_response.
+
+import asyncio
+from abc import ABC, abstractmethod
+from typing import List, Optional
+from utils.output import MAX_RESULT_OUTPUT_CHARS, stdout_digest, truncate_output
+
+# Judge0 status ids, reused by every backend so callers see one vocabulary
+STATUS_ACCEPTED = {"id": 3, "description": "Accepted"}
+STATUS_WRONG_ANSWER = {"id": 4, "description": "Wrong Answer"}
+STATUS_TIME_LIMIT_EXCEEDED = {"id": 5, "description": "Time Limit Exceeded"}
+STATUS_COMPILATION_ERROR = {"id": 6, "description": "Compilation Error"}
+STATUS_RUNTIME_ERROR_SIGSEGV = {"id": 7, "description": "Runtime Error (SIGSEGV)"}
+STATUS_RUNTIME_ERROR_NZEC = {"id": 11, "description": "Runtime Error (NZEC)"}
+STATUS_RUNTIME_ERROR_OTHER = {"id": 12, "description": "Runtime Error (Other)"}
+STATUS_INTERNAL_ERROR = {"id": 13, "description": "Internal Error"}
+
+
+def build_execution_result(
+    language_id: int,
+    stdin: str,
+    status: dict,
+    stdout: str = "",
+    stderr: str = "",
+    compile_output: str = "",
+    message: str = "",
+    time: float = 0.0,
+    memory: int = 0,
+    limits: Optional[dict] = None
+) -> dict:
+    """Result dict with the same keys as validate_and_clean_judge0_response."""
+    limits = limits or {}
+    return {
+        "stdout": truncate_output(stdout, MAX_RESULT_OUTPUT_CHARS),
+        # Taken before truncation, so answers longer than the kept stdout can still be judged
+        "stdout_sha256": stdout_digest(stdout),
+        "stderr": truncate_output(stderr, MAX_RESULT_OUTPUT_CHARS),
+        "compile_output": truncate_output(compile_output, MAX_RESULT_OUTPUT_CHARS),
+        "message": message or "",
+        "status": dict(status),
+        "language_id": language_id,
+        "stdin": stdin or "",
+        "source_code": "",
+        "expected_output": "",
+        "cpu_time_limit": limits.get("cpu_time_limit"),
+        "memory_limit": limits.get("memory_limit"),
+        "time": f"{time:.3f}",
+        "memory": memory
+    }
+
+
+class ExecutionBackend(ABC):
+    """Runs a program against stdin and returns a cleaned Judge0 style result."""
+
+    name = "base"
+
+    def supports(self, language_id: int) -> bool:
+        return True
+
+    @abstractmethod
+    async def run(self, code: str, language_id: int, stdin: str,
+                  limits: Optional[dict] = None, deadline: Optional[float] = None,
+                  expected_output: Optional[str] = None) -> dict:
+        """
+        limits uses Judge0 names and units: cpu_time_limit / wall_time_limit in seconds,
+        memory_limit in KB. deadline is how long the caller is willing to wait, in seconds.
+        expected_output lets a backend stop the program early once its output can no
+        longer match (status Wrong Answer); backends are free to ignore it.
+        """
+
+    async def run_batch(self, code: str, language_id: int, stdins: List[str],
+                        limits: Optional[dict] = None, deadline: Optional[float] = None,
+                        expected_outputs: Optional[List[str]] = None) -> List[dict]:
+        # Default: independent runs, results in the order of stdins
+        expected_outputs = expected_outputs or [None] * len(stdins)
+        return list(await asyncio.gather(*(
+            self.run(code, language_id, stdin, limits=limits, deadline=deadline, expected_output=expected)
+            for stdin, expected in zip(stdins, expected_outputs)
+        )))
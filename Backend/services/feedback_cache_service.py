@@ -0,0 +1,94 @@
+# services/feedback_cache_service.py
+#
+# Gemini feedback is reused for submissions that are the same program: same question,
+# language and pass/fail vector, and code that only differs in comments, whitespace or
+# formatting. Python is compared by its AST, other languages by their token stream.
+
+import ast
+import copy
+import hashlib
+import os
+import re
+from typing import Awaitable, Callable, List, Optional
+from dotenv import load_dotenv
+from logging_config import logger
+from utils.cache import TieredCache, cache_key
+from utils.key_rotator import SingleFlight
+from utils.metrics import register_provider
+
+load_dotenv()
+
+FEEDBACK_CACHE_ENABLED = os.getenv("FEEDBACK_CACHE_ENABLED", "true").lower() == "true"
+FEEDBACK_CACHE_SIZE = int(os.getenv("FEEDBACK_CACHE_SIZE", "1024"))
+FEEDBACK_CACHE_TTL_SECONDS = float(os.getenv("FEEDBACK_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+# Optional on-disk tier so feedback survives restarts and is shared by workers. Off unless set;
+# point it into a directory owned by the app, not a shared one such as /tmp
+FEEDBACK_CACHE_DB_PATH = os.getenv("FEEDBACK_CACHE_DB_PATH")
+
+# String and char literals are kept verbatim, comments are dropped, everything else is split into tokens
+_C_STYLE_TOKENS = re.compile(
+    r'"(?:\\.|[^"\\\n])*"|\'(?:\\.|[^\'\\\n])*\'|(?P<comment>//[^\n]*|/\*.*?\*/)|[A-Za-z_]\w*|\d[\w.]*|\S',
+    re.S
+)
+_HASH_COMMENT_TOKENS = re.compile(
+    r'"(?:\\.|[^"\\\n])*"|\'(?:\\.|[^\'\\\n])*\'|(?P<comment>#[^\n]*)|[A-Za-z_]\w*|\d[\w.]*|\S'
+)
+
+_feedback_cache = TieredCache(
+    "feedback", FEEDBACK_CACHE_SIZE, FEEDBACK_CACHE_TTL_SECONDS, db_path=FEEDBACK_CACHE_DB_PATH or None
+)
+# Identical submissions in flight at the same time (double clicks, a class submitting the reference
+# solution) share one Gemini call. Keyed like the cache, since their prompts differ in volatile
+# fields such as the measured run time
+_feedback_single_flight = SingleFlight("feedback")
+register_provider("feedback_single_flight", _feedback_single_flight.snapshot)
+
+
+def _token_stream(code: str, pattern: re.Pattern) -> str:
+    return " ".join(m.group(0) for m in pattern.finditer(code) if not m.group("comment"))
+
+
+def code_fingerprint(code: str, language: str) -> str:
+    """Hash of the code with comments and formatting removed."""
+    if language.lower() == "python":
+        try:
+            # Attributes (line / column numbers) are left out of the dump by default
+            normalized = "ast:" + ast.dump(ast.parse(code))
+        except (SyntaxError, ValueError, RecursionError, MemoryError):
+            normalized = "tokens:" + _token_stream(code, _HASH_COMMENT_TOKENS)
+    else:
+        normalized = "tokens:" + _token_stream(code, _C_STYLE_TOKENS)
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def feedback_cache_key(kind: str, question_id: int, language: str, code: str,
+                       test_statuses: Optional[List[str]] = None) -> str:
+    # test_statuses is the per example Passed / Failed / Skipped vector, in example order
+    return cache_key(kind, question_id, language.lower(), code_fingerprint(code, language), test_statuses)
+
+
+async def cached_feedback(key: str, generate: Callable[[], Awaitable[dict]]) -> dict:
+    """
+    Cached feedback for key, or generate() and cache it; concurrent requests for one key share a
+    single generate(). Empty results (Gemini unavailable) are not cached.
+    """
+    feedback = await _feedback_single_flight.do(key, lambda: _lookup_or_generate(key, generate))
+    # Callers may modify the feedback, never hand out the shared or cached object itself
+    return copy.deepcopy(feedback)
+
+
+async def _lookup_or_generate(key: str, generate: Callable[[], Awaitable[dict]]) -> dict:
+    if not FEEDBACK_CACHE_ENABLED:
+        return await generate()
+    feedback = await _feedback_cache.get(key)
+    if feedback is not None:
+        logger.info("AI feedback served from the feedback cache")
+        return feedback
+    feedback = await generate()
+    if feedback:
+        await _feedback_cache.put(key, feedback)
+    return feedback
+
+
+def close() -> None:
+    _feedback_cache.close()
@@ -1,8 +1,9 @@
 # services/recruiter_feedback_service.py
 
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from services.gemini_feedback_template_service import generate_feedback_with_gemini  
+from services.feedback_cache_service import cached_feedback, feedback_cache_key
 
 def compute_verdict(score: float) -> str:
     
@@ -24,8 +25,46 @@ async def generate_recruiter_feedback(
     expected_outputs: List[str],
     actual_output: str,
     time_taken: str,
-    attempts: List[str]
+    attempts: List[str],
+    question_id: Optional[int] = None,
+    test_statuses: Optional[List[str]] = None
 ) -> Dict[str, Any]:
+    # ✅ Correct function usage
+    async def generate() -> Dict[str, Any]:
+        return await generate_feedback_with_gemini(
+            code=code,
+            question_description=question_description,
+            language=language,
+            judge_result=judge_result,
+            expected_outputs=expected_outputs,
+            actual_output=actual_output
+        )
+
+    if question_id is None:
+        ai_feedback = await generate()
+    else:
+        # The same program with the same test outcomes gets the same assessment, skip the Gemini call
+        key = feedback_cache_key("recruiter", question_id, language, code, test_statuses)
+        ai_feedback = await cached_feedback(key, generate)
+
+    return build_recruiter_feedback(
+        language=language,
+        judge_result=judge_result,
+        expected_outputs=expected_outputs,
+        time_taken=time_taken,
+        attempts=attempts,
+        ai_feedback=ai_feedback
+    )
+
+def build_recruiter_feedback(
+    language: str,
+    judge_result: Dict[str, Any],
+    expected_outputs: List[str],
+    time_taken: str,
+    attempts: List[str],
+    ai_feedback: Dict[str, Any]
+) -> Dict[str, Any]:
+    """Compose the recruiter report from execution results and an AI (or locally built) assessment."""
     passed = judge_result.get("passed", 0)
     total = judge_result.get("total", len(expected_outputs))
     edge_cases_handled = judge_result.get("edge_cases_handled", False)
@@ -38,16 +77,6 @@ async def generate_recruiter_feedback(
     verdict_score = (coverage_percent + (100 if logical_accuracy == "Correct" else 60)) / 2
     verdict = compute_verdict(verdict_score)
 
-    # ✅ Correct function usage
-    ai_feedback = await generate_feedback_with_gemini(
-        code=code,
-        question_description=question_description,
-        language=language,
-        judge_result=judge_result,
-        expected_outputs=expected_outputs,
-        actual_output=actual_output
-    )
-
     return {
     "problem_solving_score_out_of_100": ai_feedback.get("problem_solving_score", 0),
     "code_correctness_score_out_of_100": passed / total * 100 if total else 0,
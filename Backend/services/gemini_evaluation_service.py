@@ -4,6 +4,7 @@ from datetime import datetime
 from models.code_evaluation_model import CodeSubmission, EvaluationResult
 from services.question_loader_service import get_question_by_id as csv_get_question_by_id
 from services.gemini_evaluation_template  import code_evaluation_by_gemini
+from services.feedback_cache_service import cached_feedback, feedback_cache_key
 from logging_config import logger
 
 
@@ -33,12 +34,15 @@ async def evaluate_code_with_gemini(submission: CodeSubmission) -> EvaluationRes
 
         # Call Gemini to generate test cases and evaluate code
         start_time = datetime.utcnow()
-        gemini_response = await code_evaluation_by_gemini(
-            code=submission.code,
-            language=language_name,
-            question_title=question.title,
-            question_description=question.description           
-            
+        # Identical programs (ignoring comments and formatting) get the cached verdict
+        gemini_response = await cached_feedback(
+            feedback_cache_key("gemini_evaluation", question.id, language_name, submission.code),
+            lambda: code_evaluation_by_gemini(
+                code=submission.code,
+                language=language_name,
+                question_title=question.title,
+                question_description=question.description
+            )
         )
 
         end_time = datetime.utcnow()
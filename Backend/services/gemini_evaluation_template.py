@@ -1,6 +1,7 @@
 import json
 import logging
 from utils.key_rotator import rotate_gemini_keys
+from utils.circuit_breaker import CircuitOpenError
 
 logger = logging.getLogger(__name__)
 
@@ -72,6 +73,9 @@ async def code_evaluation_by_gemini(code, question_title, question_description,
             text = text[:-3].strip()
 
         return json.loads(text)
+    except CircuitOpenError as e:
+        logger.warning(f"Skipping Gemini-only evaluation: {e}")
+        return {}
     except Exception as e:
         logger.error(f"Failed to generate Gemini-only test & feedback: {e}", exc_info=True)
         return {}
@@ -2,6 +2,7 @@ import logging
 import json
 from dotenv import load_dotenv
 from utils.key_rotator import rotate_gemini_keys  
+from utils.circuit_breaker import CircuitOpenError
 
 
 load_dotenv()
@@ -118,6 +119,11 @@ async def generate_feedback_with_gemini(code, question_description, language, ju
             # Return an empty dictionary
             return {}
 
+    # Gemini is known to be down: degrade to the report built from execution results alone
+    except CircuitOpenError as e:
+        logger.warning(f"Skipping AI feedback: {e}")
+        return {}
+
     # Catch any other exceptions and log an error
     except Exception as e:
         logger.error(f"Gemini feedback generation failed: {e}", exc_info=True)
@@ -0,0 +1,96 @@
+# services/judge0_callback_service.py
+#
+# Judge0 can PUT the finished submission to a `callback_url` instead of being polled.
+# evaluate_code registers the token it is waiting for and the callback route resolves it.
+
+import asyncio
+import base64
+import os
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlencode, urlsplit, urlunsplit
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Shared secret Judge0 must send back as ?secret=... on the callback URL. Without it the
+# callback route is disabled and results are always polled
+JUDGE0_CALLBACK_SECRET = os.getenv("JUDGE0_CALLBACK_SECRET")
+
+# Callbacks that arrive before the submitting request registered its token are kept this long,
+# and at most this many of them (oldest dropped first)
+EARLY_CALLBACK_TTL_SECONDS = 300
+EARLY_CALLBACK_MAX_ENTRIES = int(os.getenv("EARLY_CALLBACK_MAX_ENTRIES", "1000"))
+
+# Judge0 always sends these fields base64 encoded in callbacks
+_BASE64_FIELDS = ("stdout", "stderr", "compile_output", "message")
+
+_waiters: Dict[str, asyncio.Future] = {}
+_early_results: "OrderedDict[str, Tuple[float, dict]]" = OrderedDict()
+
+def callback_url(url: str) -> str:
+    """The callback URL given to Judge0, with the shared secret added to its query string."""
+    parts = urlsplit(url)
+    if "secret" in parse_qs(parts.query):
+        return url
+    query = "&".join(part for part in (parts.query, urlencode({"secret": JUDGE0_CALLBACK_SECRET})) if part)
+    return urlunsplit(parts._replace(query=query))
+
+def decode_callback_payload(payload: dict) -> dict:
+    """Decode the base64 text fields of a Judge0 callback body."""
+    decoded = dict(payload)
+    for field in _BASE64_FIELDS:
+        value = decoded.get(field)
+        if value:
+            try:
+                decoded[field] = base64.b64decode(value).decode("utf-8", errors="replace")
+            except (ValueError, TypeError):
+                # Already plain text (e.g. a stand-in that does not encode), keep as is
+                pass
+    return decoded
+
+def _prune_early_results() -> None:
+    # Insertion order is arrival order: expired entries are at the front
+    now = time.monotonic()
+    while _early_results and (
+        len(_early_results) > EARLY_CALLBACK_MAX_ENTRIES
+        or now - next(iter(_early_results.values()))[0] > EARLY_CALLBACK_TTL_SECONDS
+    ):
+        _early_results.popitem(last=False)
+
+def expect(token: str) -> asyncio.Future:
+    """Return a future resolved with the decoded submission when Judge0 calls back for token."""
+    future = asyncio.get_running_loop().create_future()
+    early = _early_results.pop(token, None)
+    if early:
+        future.set_result(early[1])
+    else:
+        _waiters[token] = future
+    return future
+
+def discard(token: str) -> None:
+    # Stop waiting for token (result obtained by polling, or request cancelled)
+    future = _waiters.pop(token, None)
+    if future and not future.done():
+        future.cancel()
+
+def resolve(token: str, payload: dict) -> bool:
+    """Deliver a callback. Returns True when a request was waiting for it."""
+    result = decode_callback_payload(payload)
+    future = _waiters.pop(token, None)
+    if future and not future.done():
+        future.set_result(result)
+        return True
+    # The submit response has not been processed yet, keep the result for expect()
+    _early_results.pop(token, None)
+    _early_results[token] = (time.monotonic(), result)
+    _prune_early_results()
+    return False
+
+async def wait_for_callback(future: asyncio.Future, timeout: float) -> Optional[dict]:
+    """Wait up to timeout seconds for a callback; None when it did not arrive in time."""
+    try:
+        return await asyncio.wait_for(asyncio.shield(future), timeout=max(0.0, timeout))
+    except asyncio.TimeoutError:
+        return None
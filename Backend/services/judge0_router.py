@@ -0,0 +1,219 @@
+# services/judge0_router.py
+#
+# Spreads submissions across several Judge0 deployments (self-hosted instances, RapidAPI, ...).
+# Each endpoint has its own keys, auth header, weight and concurrency limit. Work goes to the
+# healthy endpoint with the shortest queue relative to its weight, endpoints are probed in
+# the background, and runs that fail for infrastructure reasons are retried on another one.
+
+import asyncio
+import json
+import os
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+from dotenv import load_dotenv
+from logging_config import logger
+from utils.http_client import get_http_client
+from utils.key_rotator import KeyPool, judge0_breaker, judge0_key_pool
+from utils.metrics import increment
+
+load_dotenv()
+
+# Judge0 deployments as a JSON list, e.g.
+# [{"name": "self-hosted", "base_url": "http://judge0:2358", "auth_header": "X-Auth-Token",
+#   "keys_env": "JUDGE0_SELF_HOSTED_KEYS", "weight": 3, "max_concurrency": 20},
+#  {"name": "rapidapi", "base_url": "https://judge0-ce.p.rapidapi.com",
+#   "host": "judge0-ce.p.rapidapi.com", "keys_env": "JUDGE0_API_KEYS", "weight": 1}]
+# Unset: a single endpoint built from JUDGE0_BASE_URL / JUDGE0_API_HOST / JUDGE0_API_KEYS.
+JUDGE0_BACKENDS = os.getenv("JUDGE0_BACKENDS")
+# Seconds between background health probes (GET /about); 0 disables probing
+JUDGE0_HEALTH_CHECK_INTERVAL = float(os.getenv("JUDGE0_HEALTH_CHECK_INTERVAL", "30"))
+# Consecutive failed runs or probes after which an endpoint only gets traffic if nothing else is healthy
+JUDGE0_UNHEALTHY_AFTER = int(os.getenv("JUDGE0_UNHEALTHY_AFTER", "3"))
+
+
+class Judge0Endpoint:
+    """One Judge0 deployment and its live load and health."""
+
+    def __init__(self, name: str, base_url: str, host: Optional[str] = None, key_pool: Optional[KeyPool] = None,
+                 auth_header: str = "X-RapidAPI-Key", weight: float = 1.0, max_concurrency: int = 5):
+        self.name = name
+        self.base_url = base_url.rstrip("/")
+        self.host = host
+        self.key_pool = key_pool or judge0_key_pool
+        self.auth_header = auth_header
+        self.weight = max(0.01, float(weight))
+        # Bounds concurrent single submissions; batches count towards in_flight
+        self.semaphore = asyncio.Semaphore(max(1, int(max_concurrency)))
+        self.in_flight = 0
+        self.consecutive_failures = 0
+        self.last_failure = 0.0
+        self.successes = 0
+        self.failures = 0
+        self.latency_ewma: Optional[float] = None
+        # Shared with the key rotator, which trips it on exhausted keys and upstream errors
+        self.breaker = judge0_breaker(self.base_url)
+
+    def headers(self, used_key: Optional[str] = None) -> dict:
+        headers = {"Content-Type": "application/json"}
+        if self.host:
+            headers["X-RapidAPI-Host"] = self.host
+        if used_key:
+            headers[self.auth_header] = used_key
+        return headers
+
+    def healthy(self) -> bool:
+        return self.consecutive_failures < JUDGE0_UNHEALTHY_AFTER and not self.breaker.is_open()
+
+    def load(self) -> float:
+        # Queue depth relative to capacity share: an endpoint with weight 3 takes three times the work
+        return (self.in_flight + 1) / self.weight
+
+    def record_success(self, elapsed: float) -> None:
+        self.successes += 1
+        self.consecutive_failures = 0
+        self.latency_ewma = elapsed if self.latency_ewma is None else 0.8 * self.latency_ewma + 0.2 * elapsed
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self.consecutive_failures += 1
+        self.last_failure = time.monotonic()
+        if self.consecutive_failures == JUDGE0_UNHEALTHY_AFTER:
+            logger.warning(f"Judge0 endpoint '{self.name}' marked unhealthy")
+
+    def snapshot(self) -> dict:
+        return {
+            "base_url": self.base_url,
+            "healthy": self.healthy(),
+            "circuit": self.breaker.current_state(),
+            "weight": self.weight,
+            "in_flight": self.in_flight,
+            "successes": self.successes,
+            "failures": self.failures,
+            "latency_ewma": round(self.latency_ewma, 3) if self.latency_ewma is not None else None,
+            "keys": self.key_pool.snapshot()
+        }
+
+
+def endpoints_from_env(default_base_url: str, default_host: Optional[str], default_max_concurrency: int,
+                       host_concurrency: Dict[str, int]) -> List[Judge0Endpoint]:
+    if not JUDGE0_BACKENDS:
+        return [Judge0Endpoint(
+            "default", default_base_url, host=default_host,
+            max_concurrency=int(host_concurrency.get(default_host or "", default_max_concurrency))
+        )]
+    endpoints = []
+    for index, config in enumerate(json.loads(JUDGE0_BACKENDS)):
+        name = config.get("name") or f"judge0-{index}"
+        keys_env = config.get("keys_env")
+        if not keys_env or keys_env == judge0_key_pool.env_var:
+            key_pool = judge0_key_pool
+        else:
+            key_pool = KeyPool(f"judge0:{name}", keys_env)
+        endpoints.append(Judge0Endpoint(
+            name,
+            config["base_url"],
+            host=config.get("host"),
+            key_pool=key_pool,
+            auth_header=config.get("auth_header", "X-RapidAPI-Key"),
+            weight=config.get("weight", 1.0),
+            max_concurrency=config.get("max_concurrency", host_concurrency.get(config.get("host") or "", default_max_concurrency))
+        ))
+    return endpoints
+
+
+class Judge0Router:
+    """Least-loaded routing with health tracking and failover across Judge0 endpoints."""
+
+    def __init__(self, endpoints: List[Judge0Endpoint]):
+        self.endpoints = endpoints
+        self._health_task: Optional[asyncio.Task] = None
+
+    def ranked(self, exclude=()) -> List[Judge0Endpoint]:
+        """Endpoints to try in order: healthy before unhealthy, then least loaded; unhealthy ones oldest failure first."""
+        candidates = [endpoint for endpoint in self.endpoints if endpoint not in exclude]
+        return sorted(
+            candidates,
+            key=lambda e: (not e.healthy(), e.load() if e.healthy() else e.last_failure)
+        )
+
+    async def run(self, items: List, call: Callable[[Judge0Endpoint, List, float], Awaitable[List[dict]]],
+                  failed: Callable[[dict], bool], deadline: float) -> List[dict]:
+        """
+        Run call(endpoint, items, seconds_left) and return one result per item. Items whose result
+        is an infrastructure failure (failed(result) is True) are retried on the next endpoint.
+        deadline (seconds) covers every attempt together: a failover only gets the time left.
+        """
+        results: List[Optional[dict]] = [None] * len(items)
+        remaining = list(range(len(items)))
+        tried = []
+        deadline_at = time.monotonic() + deadline
+        while remaining:
+            ranked = self.ranked(exclude=tried)
+            seconds_left = deadline_at - time.monotonic()
+            if not ranked:
+                break
+            if seconds_left <= 0:
+                # The failed results stand; no time is left to run them anywhere else
+                logger.warning(f"No time left to fail {len(remaining)} runs over to another Judge0 endpoint")
+                break
+            endpoint = ranked[0]
+            tried.append(endpoint)
+            endpoint.in_flight += len(remaining)
+            start = time.monotonic()
+            try:
+                batch = await call(endpoint, [items[i] for i in remaining], seconds_left)
+            finally:
+                endpoint.in_flight -= len(remaining)
+            retry = []
+            for i, result in zip(remaining, batch):
+                results[i] = result
+                if failed(result):
+                    retry.append(i)
+            if len(retry) == len(remaining):
+                endpoint.record_failure()
+            else:
+                endpoint.record_success(time.monotonic() - start)
+            if retry and len(tried) < len(self.endpoints):
+                increment("judge0_failovers")
+                logger.warning(f"{len(retry)} runs failed on Judge0 endpoint '{endpoint.name}', failing over")
+            remaining = retry
+        return results
+
+    async def probe(self, endpoint: Judge0Endpoint) -> bool:
+        key_states = endpoint.key_pool.candidates()
+        headers = endpoint.headers(key_states[0].key if key_states else None)
+        try:
+            response = await get_http_client("judge0").get(f"{endpoint.base_url}/about", headers=headers, timeout=5.0)
+            ok = response.status_code < 500 and response.status_code not in (401, 403)
+        except Exception as e:
+            logger.warning(f"Judge0 endpoint '{endpoint.name}' health probe failed: {e}")
+            ok = False
+        if ok:
+            if not endpoint.healthy():
+                logger.info(f"Judge0 endpoint '{endpoint.name}' is healthy again")
+            endpoint.consecutive_failures = 0
+        else:
+            endpoint.record_failure()
+        return ok
+
+    async def _health_loop(self) -> None:
+        while True:
+            await asyncio.gather(*(self.probe(endpoint) for endpoint in self.endpoints))
+            await asyncio.sleep(JUDGE0_HEALTH_CHECK_INTERVAL)
+
+    def start(self) -> None:
+        # Probing a single endpoint buys nothing, there is nowhere to fail over to
+        if JUDGE0_HEALTH_CHECK_INTERVAL > 0 and len(self.endpoints) > 1 and self._health_task is None:
+            self._health_task = asyncio.create_task(self._health_loop())
+
+    async def close(self) -> None:
+        if self._health_task is not None:
+            self._health_task.cancel()
+            try:
+                await self._health_task
+            except asyncio.CancelledError:
+                pass
+            self._health_task = None
+
+    def snapshot(self) -> dict:
+        return {endpoint.name: endpoint.snapshot() for endpoint in self.endpoints}
@@ -0,0 +1,404 @@
+# services/local_execution_service.py
+#
+# Runs submissions on this host in a sandbox instead of sending them to Judge0: rlimits for
+# CPU time, memory and file size, a wall-clock timeout, capped output, no network, a private
+# root file system and no privileges (see services/sandbox.py). Hosts that cannot provide
+# that isolation get no local execution at all: every language goes to Judge0.
+# Python runs in a sandboxed interpreter; C, C++, Java and C# are compiled once per source
+# (services/compilation_service.py) when the toolchain is installed.
+
+import asyncio
+import json
+import os
+import sys
+import tempfile
+from typing import List, Optional
+from dotenv import load_dotenv
+from logging_config import logger
+from services import sandbox
+from services.local_worker_pool import WarmWorkerPool
+from services.compilation_service import (
+    ArtifactCache,
+    CompiledArtifact,
+    COMPILED_LANGUAGES,
+    is_compiled_language,
+    resolve_argv,
+    toolchain_available,
+)
+from services.execution_backend import (
+    ExecutionBackend,
+    build_execution_result,
+    STATUS_ACCEPTED,
+    STATUS_WRONG_ANSWER,
+    STATUS_TIME_LIMIT_EXCEEDED,
+    STATUS_COMPILATION_ERROR,
+    STATUS_RUNTIME_ERROR_SIGSEGV,
+    STATUS_RUNTIME_ERROR_NZEC,
+    STATUS_RUNTIME_ERROR_OTHER,
+    STATUS_INTERNAL_ERROR,
+)
+
+load_dotenv()
+
+PYTHON_LANGUAGE_ID = 71
+
+# Defaults used when the caller does not pass limits (Judge0 units: seconds and KB)
+LOCAL_CPU_TIME_LIMIT = float(os.getenv("LOCAL_CPU_TIME_LIMIT", "2"))
+LOCAL_WALL_TIME_LIMIT = float(os.getenv("LOCAL_WALL_TIME_LIMIT", "5"))
+LOCAL_MEMORY_LIMIT_KB = int(os.getenv("LOCAL_MEMORY_LIMIT_KB", "262144"))
+LOCAL_MAX_OUTPUT_BYTES = int(os.getenv("LOCAL_MAX_OUTPUT_BYTES", "65536"))
+# Number of sandboxed programs allowed to run at once
+LOCAL_MAX_CONCURRENCY = int(os.getenv("LOCAL_MAX_CONCURRENCY", str(os.cpu_count() or 2)))
+
+# Warm fork servers kept ready for runs (0 starts a fresh sandbox process per run instead)
+LOCAL_WARM_POOL_SIZE = int(os.getenv("LOCAL_WARM_POOL_SIZE", str(os.cpu_count() or 2)))
+# Run all test cases of a Python submission as one job: a single sandbox process forks a fresh
+# child per test case and reports their results, instead of one round trip per test case.
+# The harness runs the tests one after another in one concurrency slot, so "auto" only uses it
+# without a warm pool, where it saves a sandbox process per test; "true" / "false" force it
+LOCAL_HARNESS_MODE = os.getenv("LOCAL_HARNESS_MODE", "auto").lower()
+# Extra wall time granted to a whole harness run on top of the per-test limits
+LOCAL_HARNESS_SLACK_SECONDS = float(os.getenv("LOCAL_HARNESS_SLACK_SECONDS", "2"))
+# Time a freshly spawned sandbox process gets on top of its job's wall limit to start up and report
+LOCAL_SPAWN_SLACK_SECONDS = float(os.getenv("LOCAL_SPAWN_SLACK_SECONDS", "2"))
+# Limits for the compiler itself; compilers are trusted more than the programs they build
+LOCAL_COMPILE_CPU_LIMIT = float(os.getenv("LOCAL_COMPILE_CPU_LIMIT", "10"))
+LOCAL_COMPILE_WALL_LIMIT = float(os.getenv("LOCAL_COMPILE_WALL_LIMIT", "30"))
+LOCAL_COMPILE_MAX_FILE_BYTES = int(os.getenv("LOCAL_COMPILE_MAX_FILE_BYTES", str(64 * 1024 * 1024)))
+
+
+def resolve_limits(limits: Optional[dict]) -> dict:
+    limits = limits or {}
+    return {
+        "cpu_time_limit": float(limits.get("cpu_time_limit") or LOCAL_CPU_TIME_LIMIT),
+        "wall_time_limit": float(limits.get("wall_time_limit") or LOCAL_WALL_TIME_LIMIT),
+        "memory_limit": int(limits.get("memory_limit") or LOCAL_MEMORY_LIMIT_KB)
+    }
+
+
+def _kill_group(proc: asyncio.subprocess.Process) -> None:
+    # The sandbox runs in its own session, kill everything it may have spawned
+    try:
+        os.killpg(proc.pid, 9)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+async def _read_capped(stream: asyncio.StreamReader, cap: int, proc: asyncio.subprocess.Process) -> tuple:
+    """Read a stream to EOF keeping at most cap bytes; kills the process on overflow. Returns (data, overflowed)."""
+    chunks, size = [], 0
+    while True:
+        chunk = await stream.read(65536)
+        if not chunk:
+            return b"".join(chunks), False
+        if size + len(chunk) > cap:
+            chunks.append(chunk[:cap - size])
+            _kill_group(proc)
+            return b"".join(chunks), True
+        chunks.append(chunk)
+        size += len(chunk)
+
+
+class LocalSubprocessBackend(ExecutionBackend):
+    """
+    Executes submissions in a sandbox. With a warm pool every run is a fresh child forked
+    from a pre-started server; without one a new sandbox process is spawned per run.
+    Compiled languages are built once per source and every test case runs the cached artifact.
+    """
+
+    name = "local"
+
+    def __init__(self, max_concurrency: int = LOCAL_MAX_CONCURRENCY, warm_pool_size: int = LOCAL_WARM_POOL_SIZE):
+        self._semaphore = asyncio.Semaphore(max(1, max_concurrency))
+        self._pool: Optional[WarmWorkerPool] = WarmWorkerPool(warm_pool_size) if warm_pool_size > 0 else None
+        self._pool_lock = asyncio.Lock()
+        self._artifacts = ArtifactCache()
+        self._toolchains = {}
+        # Whether this host can isolate programs, checked once
+        self._isolated: Optional[bool] = None
+
+    def isolated(self) -> bool:
+        if self._isolated is None:
+            self._isolated = sandbox.isolation_available()
+            if not self._isolated:
+                logger.error("Sandbox isolation (namespaces, private root, unprivileged user) is unavailable "
+                             "on this host, local execution is disabled")
+        return self._isolated
+
+    async def start(self) -> None:
+        # Started from the app lifespan, or lazily by the first run
+        if self._isolated is None:
+            await asyncio.to_thread(self.isolated)
+        if self._pool is not None and self._isolated:
+            async with self._pool_lock:
+                await self._pool.start()
+
+    async def close(self) -> None:
+        if self._pool is not None:
+            await self._pool.close()
+        self._artifacts.clear()
+
+    def snapshot(self) -> dict:
+        return {
+            "isolated": self._isolated,
+            "warm_pool": self._pool.snapshot() if self._pool is not None else None,
+            "artifacts": self._artifacts.snapshot()
+        }
+
+    def supports(self, language_id: int) -> bool:
+        if not self.isolated():
+            return False
+        if language_id == PYTHON_LANGUAGE_ID:
+            return True
+        if language_id not in self._toolchains:
+            self._toolchains[language_id] = toolchain_available(language_id)
+        return self._toolchains[language_id]
+
+    async def run(self, code: str, language_id: int, stdin: str,
+                  limits: Optional[dict] = None, deadline: Optional[float] = None,
+                  expected_output: Optional[str] = None) -> dict:
+        if is_compiled_language(language_id):
+            return (await self.run_batch(
+                code, language_id, [stdin], limits=limits, deadline=deadline, expected_outputs=[expected_output]
+            ))[0]
+        limits = resolve_limits(limits)
+        if not self.supports(language_id):
+            return self._unsupported(language_id, stdin, limits)
+        return await self._run_guarded(language_id, stdin, limits, self._job(
+            stdin, limits, code=code, memory_bytes=limits["memory_limit"] * 1024, expected_output=expected_output
+        ))
+
+    async def run_batch(self, code: str, language_id: int, stdins: List[str],
+                        limits: Optional[dict] = None, deadline: Optional[float] = None,
+                        expected_outputs: Optional[List[str]] = None) -> List[dict]:
+        expected_outputs = expected_outputs or [None] * len(stdins)
+        if not is_compiled_language(language_id):
+            if language_id == PYTHON_LANGUAGE_ID and self._use_harness() and len(stdins) > 1:
+                results = await self._run_python_harness(code, stdins, resolve_limits(limits), expected_outputs)
+                if results is not None:
+                    return results
+            return await super().run_batch(
+                code, language_id, stdins, limits=limits, deadline=deadline, expected_outputs=expected_outputs
+            )
+        limits = resolve_limits(limits)
+        if not self.supports(language_id):
+            return [self._unsupported(language_id, stdin, limits) for stdin in stdins]
+
+        try:
+            artifact = await self._artifacts.get_or_compile(code, language_id, self._compile)
+        except Exception as e:
+            logger.critical(f"Local compilation failed: {e}", exc_info=True)
+            return [build_execution_result(
+                language_id, stdin, STATUS_INTERNAL_ERROR, message=f"Unexpected error: {e}", limits=limits
+            ) for stdin in stdins]
+        if not artifact.ok:
+            # Nothing to run: every test case reports the same compilation error
+            return [build_execution_result(
+                language_id, stdin, STATUS_COMPILATION_ERROR,
+                compile_output=artifact.compile_output, message="Compilation failed", limits=limits
+            ) for stdin in stdins]
+        return list(await asyncio.gather(*(
+            self._run_artifact(artifact, stdin, limits, expected)
+            for stdin, expected in zip(stdins, expected_outputs)
+        )))
+
+    def _use_harness(self) -> bool:
+        if LOCAL_HARNESS_MODE == "auto":
+            return self._pool is None
+        return LOCAL_HARNESS_MODE == "true"
+
+    async def _run_python_harness(self, code: str, stdins: List[str], limits: dict,
+                                  expected_outputs: List[Optional[str]]) -> Optional[List[dict]]:
+        """All test cases as one sandbox job. None when the harness itself failed (caller reruns per test)."""
+        count = len(stdins)
+        job = {
+            "code": code,
+            "stdins": [stdin or "" for stdin in stdins],
+            "stdin": "",
+            "memory_bytes": limits["memory_limit"] * 1024,
+            "file_size_bytes": LOCAL_MAX_OUTPUT_BYTES,
+            "wall_seconds": limits["wall_time_limit"] * count + LOCAL_HARNESS_SLACK_SECONDS,
+            # Room for every test's stdout and stderr even if JSON escaping inflates them
+            "max_output_bytes": (LOCAL_MAX_OUTPUT_BYTES * 2 * 6 + 1024) * count,
+            "test_wall_seconds": limits["wall_time_limit"],
+            "test_cpu_seconds": limits["cpu_time_limit"],
+            "test_output_bytes": LOCAL_MAX_OUTPUT_BYTES
+        }
+        if any(expected is not None for expected in expected_outputs):
+            job["expected_outputs"] = expected_outputs
+        async with self._semaphore:
+            try:
+                tests = (await self._run_job(job))["results"]
+                if len(tests) != count:
+                    raise RuntimeError(f"{len(tests)} results for {count} test cases")
+            except Exception as e:
+                logger.warning(f"Harness run failed ({e}), running test cases one by one")
+                return None
+        return [self._to_result(PYTHON_LANGUAGE_ID, test, stdin, limits) for test, stdin in zip(tests, stdins)]
+
+    async def _run_artifact(self, artifact: CompiledArtifact, stdin: str, limits: dict,
+                            expected_output: Optional[str] = None) -> dict:
+        spec = COMPILED_LANGUAGES[artifact.language_id]
+        memory_bytes = limits["memory_limit"] * 1024 if spec["address_space_limit"] else 0
+        return await self._run_guarded(artifact.language_id, stdin, limits, self._job(
+            stdin, limits, argv=artifact.run_argv(limits["memory_limit"]), memory_bytes=memory_bytes,
+            expected_output=expected_output
+        ))
+
+    async def _compile(self, language_id: int, directory: str) -> tuple:
+        """Run the compiler in the sandbox inside the artifact directory. Returns (ok, compiler output)."""
+        job = {
+            "argv": resolve_argv(COMPILED_LANGUAGES[language_id]["compile"], directory),
+            "cwd": directory,
+            "stdin": "",
+            "cpu_seconds": LOCAL_COMPILE_CPU_LIMIT,
+            # Compilers (javac in particular) reserve lots of address space, rely on the CPU limit
+            "memory_bytes": 0,
+            "file_size_bytes": LOCAL_COMPILE_MAX_FILE_BYTES,
+            "wall_seconds": LOCAL_COMPILE_WALL_LIMIT,
+            "max_output_bytes": LOCAL_MAX_OUTPUT_BYTES
+        }
+        async with self._semaphore:
+            result = await self._run_job(job)
+        output = "\n".join(part for part in (result["stdout"].strip(), result["stderr"].strip()) if part)
+        if self._isolation_failed(result):
+            raise RuntimeError(result["stderr"].strip())
+        if result["timed_out"] or result["returncode"] in (-24, -9):
+            return False, (output + "\nCompilation time limit exceeded").strip()
+        return result["returncode"] == 0, output
+
+    async def _run_guarded(self, language_id: int, stdin: str, limits: dict, job: dict) -> dict:
+        async with self._semaphore:
+            try:
+                result = await self._run_job(job)
+            except Exception as e:
+                logger.critical(f"Local execution failed: {e}", exc_info=True)
+                return build_execution_result(
+                    language_id, stdin, STATUS_INTERNAL_ERROR, message=f"Unexpected error: {e}", limits=limits
+                )
+        return self._to_result(language_id, result, stdin, limits)
+
+    @staticmethod
+    def _job(stdin: str, limits: dict, code: Optional[str] = None, argv: Optional[list] = None,
+             memory_bytes: int = 0, expected_output: Optional[str] = None) -> dict:
+        # Job format understood by the fork server (sandbox.run_job) and by _run_spawned
+        job = {
+            "stdin": stdin or "",
+            "cpu_seconds": limits["cpu_time_limit"],
+            "memory_bytes": memory_bytes,
+            "file_size_bytes": LOCAL_MAX_OUTPUT_BYTES,
+            "wall_seconds": limits["wall_time_limit"],
+            "max_output_bytes": LOCAL_MAX_OUTPUT_BYTES
+        }
+        if expected_output is not None:
+            job["expected_output"] = expected_output
+        if argv is not None:
+            job["argv"] = argv
+        else:
+            job["code"] = code
+        return job
+
+    @staticmethod
+    def _unsupported(language_id: int, stdin: str, limits: dict) -> dict:
+        return build_execution_result(
+            language_id, stdin, STATUS_INTERNAL_ERROR,
+            message=f"Language {language_id} is not supported by the local runner", limits=limits
+        )
+
+    async def _run_job(self, job: dict) -> dict:
+        if self._pool is not None:
+            await self.start()
+            if self._pool.available():
+                result = await self._pool.run(job)
+                if "error" in result:
+                    raise RuntimeError(f"Fork server error: {result['error']}")
+                return result
+            logger.warning("No warm workers available, starting a fresh sandbox process")
+        return await self._run_spawned(job)
+
+    async def _run_spawned(self, job: dict) -> dict:
+        """
+        Run one job in a freshly spawned sandbox process. It runs the job exactly like a warm
+        worker (sandbox.run_job), so times are CPU seconds on both paths.
+        """
+        with tempfile.TemporaryDirectory(prefix="sandbox-") as workdir:
+            proc = await asyncio.create_subprocess_exec(
+                sys.executable, "-I", "-S", sandbox.SCRIPT_PATH, "--job",
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                cwd=job.get("cwd") or workdir,
+                env=sandbox.SANDBOX_ENV,
+                start_new_session=True
+            )
+            # The job bounds the program itself; this only guards against the runner misbehaving
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + job["wall_seconds"] + LOCAL_SPAWN_SLACK_SECONDS
+            # Room for stdout and stderr even if JSON escaping inflates them
+            cap = job["max_output_bytes"] * 2 * 6 + 1024
+            try:
+                (stdout, overflow), (stderr, _), _ = await asyncio.wait_for(
+                    asyncio.gather(
+                        _read_capped(proc.stdout, cap, proc),
+                        _read_capped(proc.stderr, cap, proc),
+                        self._feed_stdin(proc, json.dumps(job))
+                    ),
+                    timeout=deadline - loop.time()
+                )
+                await asyncio.wait_for(proc.wait(), timeout=max(0.0, deadline - loop.time()))
+            except asyncio.TimeoutError:
+                raise RuntimeError("Sandbox process did not finish in time")
+            finally:
+                # Whatever the runner left in its session goes with it
+                _kill_group(proc)
+                await proc.wait()
+        if proc.returncode != 0 or overflow:
+            raise RuntimeError(f"Sandbox process failed with exit status {proc.returncode}: "
+                               f"{stderr.decode('utf-8', errors='replace').strip()[-500:]}")
+        return json.loads(stdout)
+
+    @staticmethod
+    async def _feed_stdin(proc: asyncio.subprocess.Process, stdin: str) -> None:
+        try:
+            if stdin:
+                proc.stdin.write(stdin.encode("utf-8"))
+                await proc.stdin.drain()
+        except (BrokenPipeError, ConnectionResetError):
+            # The program exited without reading all of its input
+            pass
+        finally:
+            proc.stdin.close()
+
+    @staticmethod
+    def _isolation_failed(result: dict) -> bool:
+        # The sandbox refused to run the program because it could not be isolated
+        return (result["returncode"] == sandbox.ISOLATION_FAILED_EXIT
+                and result["stderr"].startswith(sandbox.ISOLATION_FAILED_MESSAGE))
+
+    @classmethod
+    def _to_result(cls, language_id: int, result: dict, stdin: str, limits: dict) -> dict:
+        returncode, overflow = result["returncode"], result["overflow"]
+        if cls._isolation_failed(result):
+            logger.critical(result["stderr"].strip())
+            status, message = STATUS_INTERNAL_ERROR, sandbox.ISOLATION_FAILED_MESSAGE
+        elif result.get("mismatch"):
+            # Killed on the first byte that could not match the expected output
+            status, message = STATUS_WRONG_ANSWER, "Output differs from the expected output"
+        # SIGXCPU / SIGKILL after the CPU rlimit are time limit violations as well
+        elif result["timed_out"] or (returncode in (-24, -9) and not overflow):
+            status, message = STATUS_TIME_LIMIT_EXCEEDED, "Time limit exceeded"
+        elif overflow:
+            status, message = STATUS_RUNTIME_ERROR_OTHER, f"Output limit of {LOCAL_MAX_OUTPUT_BYTES} bytes exceeded"
+        elif returncode == 0:
+            status, message = STATUS_ACCEPTED, ""
+        elif returncode > 0:
+            status, message = STATUS_RUNTIME_ERROR_NZEC, f"Exited with error status {returncode}"
+        elif returncode == -11:
+            status, message = STATUS_RUNTIME_ERROR_SIGSEGV, "Segmentation fault"
+        else:
+            status, message = STATUS_RUNTIME_ERROR_OTHER, f"Killed by signal {-returncode}"
+        return build_execution_result(
+            language_id, stdin, status,
+            stdout=result["stdout"], stderr=result["stderr"], message=message,
+            time=result["cpu_time"], memory=result["memory_kb"], limits=limits
+        )
@@ -0,0 +1,151 @@
+# services/local_worker_pool.py
+#
+# Pool of warm fork servers (services/sandbox.py --serve) for local Python execution.
+# Each server has already started an interpreter and imported common modules; a run
+# only costs a fork. Servers that crash or hang are replaced in the background.
+
+import asyncio
+import json
+import struct
+import sys
+from typing import List
+from logging_config import logger
+from services import sandbox
+
+# Extra time on top of the job's wall limit before a fork server is considered stuck
+WORKER_RESPONSE_SLACK_SECONDS = 5.0
+
+
+class WarmWorker:
+    """One fork server process, handling one job at a time."""
+
+    def __init__(self, proc: asyncio.subprocess.Process):
+        self.proc = proc
+        self.jobs_run = 0
+
+    @classmethod
+    async def spawn(cls) -> "WarmWorker":
+        proc = await asyncio.create_subprocess_exec(
+            sys.executable, "-I", "-S", sandbox.SCRIPT_PATH, "--serve",
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            env=sandbox.SANDBOX_ENV,
+            start_new_session=True
+        )
+        worker = cls(proc)
+        try:
+            ready = await asyncio.wait_for(worker._read_frame(), timeout=30)
+            if not ready.get("ready"):
+                raise RuntimeError(f"Fork server failed to start: {ready}")
+        except BaseException:
+            # Failed or cancelled (pool closing) before it was ready: do not leave it running
+            await worker.close()
+            raise
+        return worker
+
+    async def _read_frame(self) -> dict:
+        header = await self.proc.stdout.readexactly(4)
+        body = await self.proc.stdout.readexactly(struct.unpack(">I", header)[0])
+        return json.loads(body)
+
+    async def run(self, job: dict) -> dict:
+        body = json.dumps(job).encode("utf-8")
+        self.proc.stdin.write(struct.pack(">I", len(body)) + body)
+        await self.proc.stdin.drain()
+        result = await asyncio.wait_for(
+            self._read_frame(), timeout=job["wall_seconds"] + WORKER_RESPONSE_SLACK_SECONDS
+        )
+        self.jobs_run += 1
+        return result
+
+    def alive(self) -> bool:
+        return self.proc.returncode is None
+
+    async def close(self) -> None:
+        if self.alive():
+            try:
+                self.proc.kill()
+            except ProcessLookupError:
+                pass
+            await self.proc.wait()
+
+
+class WarmWorkerPool:
+    """A fixed number of warm fork servers shared by all requests in the process."""
+
+    def __init__(self, size: int):
+        self.size = max(1, size)
+        self._idle: asyncio.Queue = asyncio.Queue()
+        self._workers: List[WarmWorker] = []
+        self._refill_tasks = set()
+        self._started = False
+        self._closed = False
+
+    async def start(self) -> None:
+        if self._started:
+            return
+        self._started = True
+        results = await asyncio.gather(*(self._spawn() for _ in range(self.size)), return_exceptions=True)
+        failures = [r for r in results if isinstance(r, Exception)]
+        if failures:
+            logger.error(f"{len(failures)} of {self.size} warm workers failed to start: {failures[0]}")
+        logger.info(f"Warm worker pool started with {self.size - len(failures)} workers")
+
+    async def _spawn(self) -> None:
+        worker = await WarmWorker.spawn()
+        if self._closed:
+            await worker.close()
+            return
+        self._workers.append(worker)
+        self._idle.put_nowait(worker)
+
+    def _refill(self) -> None:
+        # Replace a lost worker without making the current request wait for it
+        if self._closed:
+            return
+        task = asyncio.create_task(self._spawn())
+        self._refill_tasks.add(task)
+        task.add_done_callback(self._refill_done)
+
+    def _refill_done(self, task: asyncio.Task) -> None:
+        self._refill_tasks.discard(task)
+        if not task.cancelled() and task.exception():
+            logger.error(f"Failed to refill warm worker pool: {task.exception()}")
+
+    def available(self) -> bool:
+        # False when every server failed to start and no replacement is on its way
+        return bool(self._workers) or bool(self._refill_tasks)
+
+    async def run(self, job: dict) -> dict:
+        """Run one job on the next idle fork server."""
+        worker = await self._idle.get()
+        try:
+            result = await worker.run(job)
+        except BaseException:
+            # Stuck or crashed server: drop it and start a replacement in the background
+            self._workers = [w for w in self._workers if w is not worker]
+            await worker.close()
+            self._refill()
+            raise
+        if worker.alive():
+            self._idle.put_nowait(worker)
+        else:
+            self._workers = [w for w in self._workers if w is not worker]
+            self._refill()
+        return result
+
+    def snapshot(self) -> dict:
+        return {
+            "size": self.size,
+            "alive": sum(1 for w in self._workers if w.alive()),
+            "idle": self._idle.qsize(),
+            "jobs_run": sum(w.jobs_run for w in self._workers)
+        }
+
+    async def close(self) -> None:
+        self._closed = True
+        for task in list(self._refill_tasks):
+            task.cancel()
+        for worker in self._workers:
+            await worker.close()
+        self._workers = []
@@ -1,40 +1,28 @@
-import pandas as pd
 import json
 import os
 import re
 import random
 import time
+import asyncio
 from typing import List, Optional
-from functools import wraps
 from models.code_evaluation_model import Question, Example
+from services.question_snapshot import SNAPSHOT_FILE_PATH, load_snapshot
+from utils.retry import retry_async
 from logging_config import logger
 
 CSV_FILE_PATH = "data/cleaned_formatted_problems.csv"
 
-# === Retry Decorator ===
-def retry(max_attempts=3, delay=1.0, exceptions=(Exception,)):
-    def decorator(func):
-        @wraps(func)
-        def wrapper(*args, **kwargs):
-            attempts = 0
-            while attempts < max_attempts:
-                try:
-                    return func(*args, **kwargs)
-                except exceptions as e:
-                    attempts += 1
-                    logger.warning(f"Retry {attempts}/{max_attempts} for {func.__name__} due to error: {e}")
-                    time.sleep(delay)
-            logger.error(f"All {max_attempts} attempts failed for {func.__name__}")
-            raise
-        return wrapper
-    return decorator
-
-@retry(max_attempts=3, delay=2, exceptions=(Exception,))
-def read_csv_with_retry(path):
+def _read_csv(path):
+    # pandas is only needed when parsing the raw CSV, not when a snapshot is loaded
+    import pandas as pd
     return pd.read_csv(path, on_bad_lines='skip', engine='python')
 
-@retry(max_attempts=2, delay=0.5, exceptions=(json.JSONDecodeError,))
+async def read_csv_with_retry(path):
+    # Read in a worker thread so the event loop keeps serving; only transient I/O errors are retried
+    return await retry_async(asyncio.to_thread, _read_csv, path, max_attempts=3, base_delay=1.0)
+
 def safe_json_loads(data: str):
+    # No retry: a malformed string fails the same way every time, callers fall back to repair instead
     return json.loads(data)
 
 def repair_json_string(json_str: str) -> str:
@@ -107,6 +95,71 @@ def extract_examples_safely(json_str: str) -> List[dict]:
         "explanation": "Failed to parse examples from data"
     }]
 
+def _optional_number(row, column: str, cast):
+    # Missing column, empty cell or garbage all mean "use the difficulty default"
+    import pandas as pd
+    value = row.get(column)
+    if value is None or pd.isna(value):
+        return None
+    try:
+        number = cast(float(value))
+    except (TypeError, ValueError):
+        logger.warning(f"Ignoring invalid {column} value: {value!r}")
+        return None
+    return number if number > 0 else None
+
+def _parse_question_rows(df) -> List[Question]:
+    import pandas as pd
+    questions = []
+    for index, row in df.iterrows():
+        try:
+            if pd.isna(row['id']) or pd.isna(row['title']) or pd.isna(row['examples']):
+                logger.warning(f"Skipping row {index}: Missing critical data")
+                continue
+            examples_str = str(row['examples']).strip()
+            try:
+                examples_data = extract_examples_safely(examples_str)
+            except Exception as e:
+                logger.error(f"Row {index}: All JSON parsing failed - {e}")
+                continue
+
+            examples = []
+            if isinstance(examples_data, list):
+                for example_data in examples_data:
+                    if isinstance(example_data, dict):
+                        example = Example(
+                            input=str(example_data.get('input', '')),
+                            output=str(example_data.get('output', '')),
+                            explanation=example_data.get('explanation', '')
+                        )
+                        examples.append(example)
+            else:
+                logger.warning(f"Row {index}: Examples is not a list")
+                continue
+
+            if not examples:
+                logger.warning(f"Row {index}: No valid examples found")
+                continue
+
+            question = Question(
+                id=int(float(row['id'])),
+                title=str(row['title']).strip(),
+                description=str(row['description']).strip(),
+                examples=examples,
+                difficultylevel=str(row['difficultylevel']).strip(),
+                # Optional resource profile columns
+                cpu_time_limit=_optional_number(row, 'cpu_time_limit', float),
+                wall_time_limit=_optional_number(row, 'wall_time_limit', float),
+                memory_limit=_optional_number(row, 'memory_limit', int)
+            )
+            questions.append(question)
+            logger.debug(f"Successfully loaded question {question.id}: {question.title}")
+        except Exception as e:
+            logger.error(f"Error processing row {index}: {e}")
+            continue
+
+    return questions
+
 async def load_questions_from_csv(file_path: str = CSV_FILE_PATH) -> List[Question]:
     try:
         if not os.path.exists(file_path):
@@ -115,7 +168,7 @@ async def load_questions_from_csv(file_path: str = CSV_FILE_PATH) -> List[Questi
         
         logger.info(f"Loading questions from CSV: {file_path}")
         try:
-            df = read_csv_with_retry(file_path)
+            df = await read_csv_with_retry(file_path)
         except Exception as e:
             logger.error(f"Failed to read CSV after retries: {e}")
             return []
@@ -129,50 +182,8 @@ async def load_questions_from_csv(file_path: str = CSV_FILE_PATH) -> List[Questi
             logger.info(f"Available columns: {list(df.columns)}")
             return []
 
-        questions = []
-        for index, row in df.iterrows():
-            try:
-                if pd.isna(row['id']) or pd.isna(row['title']) or pd.isna(row['examples']):
-                    logger.warning(f"Skipping row {index}: Missing critical data")
-                    continue
-                examples_str = str(row['examples']).strip()
-                try:
-                    examples_data = extract_examples_safely(examples_str)
-                except Exception as e:
-                    logger.error(f"Row {index}: All JSON parsing failed - {e}")
-                    continue
-
-                examples = []
-                if isinstance(examples_data, list):
-                    for example_data in examples_data:
-                        if isinstance(example_data, dict):
-                            example = Example(
-                                input=str(example_data.get('input', '')),
-                                output=str(example_data.get('output', '')),
-                                explanation=example_data.get('explanation', '')
-                            )
-                            examples.append(example)
-                else:
-                    logger.warning(f"Row {index}: Examples is not a list")
-                    continue
-
-                if not examples:
-                    logger.warning(f"Row {index}: No valid examples found")
-                    continue
-
-                question = Question(
-                    id=int(float(row['id'])),
-                    title=str(row['title']).strip(),
-                    description=str(row['description']).strip(),
-                    examples=examples,
-                    difficultylevel=str(row['difficultylevel']).strip()
-                )
-                questions.append(question)
-                logger.debug(f"Successfully loaded question {question.id}: {question.title}")
-            except Exception as e:
-                logger.error(f"Error processing row {index}: {e}")
-                continue
-
+        # Row parsing is CPU bound, keep it off the event loop
+        questions = await asyncio.to_thread(_parse_question_rows, df)
         logger.info(f"Successfully loaded {len(questions)} questions from CSV")
         return questions
 
@@ -180,13 +191,64 @@ async def load_questions_from_csv(file_path: str = CSV_FILE_PATH) -> List[Questi
         logger.error(f"Error loading questions from CSV: {e}", exc_info=True)
         return []
 
+# === In-memory Question Store ===
+class QuestionStore:
+    """Indexed, read-only view of the question bank built once per process."""
+
+    def __init__(self, questions: List[Question]):
+        self.questions = list(questions)
+        self.by_id = {}
+        self.by_difficulty = {}
+        for question in self.questions:
+            # Keep the first occurrence of a duplicated id, like the old linear scan did
+            self.by_id.setdefault(question.id, question)
+            self.by_difficulty.setdefault(question.difficultylevel.lower(), []).append(question)
+
+    def __len__(self) -> int:
+        return len(self.questions)
+
+    def get(self, question_id: int) -> Optional[Question]:
+        return self.by_id.get(question_id)
+
+    def for_difficulty(self, difficulty: str) -> List[Question]:
+        return self.by_difficulty.get(difficulty.lower(), [])
+
+_question_store: Optional[QuestionStore] = None
+_question_store_lock = asyncio.Lock()
+
+async def init_question_store(file_path: str = CSV_FILE_PATH, force: bool = False,
+                              snapshot_path: str = SNAPSHOT_FILE_PATH) -> QuestionStore:
+    """
+    Load the question bank and install it as the process-wide store (called from app lifespan).
+    A fresh snapshot built by services.question_snapshot is preferred over parsing the CSV.
+    """
+    global _question_store
+    async with _question_store_lock:
+        if _question_store is not None and len(_question_store) and not force:
+            return _question_store
+        start_time = time.perf_counter()
+        questions = load_snapshot(snapshot_path, file_path) if snapshot_path else None
+        if questions:
+            logger.info(f"Loaded {len(questions)} questions from snapshot {snapshot_path}")
+        else:
+            questions = await load_questions_from_csv(file_path)
+        _question_store = QuestionStore(questions)
+        logger.info(f"Question store ready with {len(_question_store)} questions in {time.perf_counter() - start_time:.2f}s")
+        return _question_store
+
+async def get_question_store() -> QuestionStore:
+    # Lazily build the store when the lifespan hook did not run (scripts, tests) or the first load came back empty
+    if _question_store is None or not len(_question_store):
+        return await init_question_store()
+    return _question_store
+
 async def get_question_by_id(question_id: int) -> Optional[Question]:
     try:
-        questions = await load_questions_from_csv()
-        for question in questions:
-            if question.id == question_id:
-                logger.info(f"Found question {question_id}: {question.title}")
-                return question
+        store = await get_question_store()
+        question = store.get(question_id)
+        if question:
+            logger.info(f"Found question {question_id}: {question.title}")
+            return question
         logger.warning(f"Question with ID {question_id} not found")
         return None
     except Exception as e:
@@ -195,12 +257,13 @@ async def get_question_by_id(question_id: int) -> Optional[Question]:
 
 async def get_random_question(difficulty: Optional[str] = None) -> Optional[Question]:
     try:
-        questions = await load_questions_from_csv()
+        store = await get_question_store()
+        questions = store.questions
         if not questions:
             logger.error("No questions available")
             return None
         if difficulty:
-            filtered_questions = [q for q in questions if q.difficultylevel.lower() == difficulty.lower()]
+            filtered_questions = store.for_difficulty(difficulty)
             if not filtered_questions:
                 logger.warning(f"No questions found for difficulty: {difficulty}")
                 selected_question = random.choice(questions)
@@ -216,8 +279,8 @@ async def get_random_question(difficulty: Optional[str] = None) -> Optional[Ques
 
 async def get_questions_by_difficulty(difficulty: str) -> List[Question]:
     try:
-        questions = await load_questions_from_csv()
-        filtered_questions = [q for q in questions if q.difficultylevel.lower() == difficulty.lower()]
+        store = await get_question_store()
+        filtered_questions = list(store.for_difficulty(difficulty))
         logger.info(f"Found {len(filtered_questions)} questions for difficulty: {difficulty}")
         return filtered_questions
     except Exception as e:
@@ -226,7 +289,8 @@ async def get_questions_by_difficulty(difficulty: str) -> List[Question]:
 
 async def get_all_questions() -> List[Question]:
     try:
-        questions = await load_questions_from_csv()
+        store = await get_question_store()
+        questions = list(store.questions)
         logger.info(f"Retrieved all {len(questions)} questions")
         return questions
     except Exception as e:
@@ -235,7 +299,7 @@ async def get_all_questions() -> List[Question]:
 
 def validate_csv_structure(file_path: str = CSV_FILE_PATH) -> bool:
     try:
-        df = read_csv_with_retry(file_path)
+        df = _read_csv(file_path)
         required_columns = ['id', 'title', 'description', 'examples', 'difficultylevel']
         missing_columns = [col for col in required_columns if col not in df.columns]
         if missing_columns:
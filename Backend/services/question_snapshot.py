@@ -0,0 +1,104 @@
+# services/question_snapshot.py
+#
+# Compiles the question bank CSV into a pre-parsed pickle snapshot so the server
+# can start without pandas or the JSON repair path.
+#
+# Build (run from the Backend directory):
+#     python -m services.question_snapshot
+#     python -m services.question_snapshot --csv data/cleaned_formatted_problems.csv --out data/questions.snapshot.pkl
+# Check whether the snapshot matches the CSV:
+#     python -m services.question_snapshot --check
+
+import argparse
+import asyncio
+import hashlib
+import os
+import pickle
+import sys
+from typing import List, Optional
+from models.code_evaluation_model import Question
+from logging_config import logger
+
+SNAPSHOT_FILE_PATH = "data/questions.snapshot.pkl"
+# Bump when the snapshot layout or the CSV parsing rules change so old snapshots get rebuilt
+SNAPSHOT_VERSION = 3
+
+def csv_fingerprint(csv_path: str) -> Optional[str]:
+    # Content hash of the source CSV, used to decide whether a snapshot is still fresh
+    if not os.path.exists(csv_path):
+        return None
+    digest = hashlib.sha256()
+    with open(csv_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def write_snapshot(questions: List[Question], csv_path: str, snapshot_path: str = SNAPSHOT_FILE_PATH) -> None:
+    """Serialize validated questions plus the CSV fingerprint they were built from."""
+    payload = {
+        "version": SNAPSHOT_VERSION,
+        "source_sha256": csv_fingerprint(csv_path),
+        "questions": [question.model_dump() for question in questions]
+    }
+    # Write to a temp file first so a crashed build never leaves a half-written snapshot behind
+    tmp_path = f"{snapshot_path}.tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, snapshot_path)
+
+def load_snapshot(snapshot_path: str = SNAPSHOT_FILE_PATH, csv_path: Optional[str] = None) -> Optional[List[Question]]:
+    """
+    Return the questions stored in the snapshot, or None when it is missing, from an
+    older format, or stale compared to csv_path (a missing CSV keeps the snapshot valid).
+    """
+    if not os.path.exists(snapshot_path):
+        return None
+    try:
+        with open(snapshot_path, "rb") as f:
+            payload = pickle.load(f)
+        if payload.get("version") != SNAPSHOT_VERSION:
+            logger.warning(f"Ignoring question snapshot {snapshot_path}: version {payload.get('version')} != {SNAPSHOT_VERSION}")
+            return None
+        if csv_path:
+            current = csv_fingerprint(csv_path)
+            if current is not None and current != payload.get("source_sha256"):
+                logger.warning(f"Ignoring stale question snapshot {snapshot_path}; rebuild it from {csv_path}")
+                return None
+        return [Question.model_validate(data) for data in payload["questions"]]
+    except Exception as e:
+        logger.error(f"Failed to load question snapshot {snapshot_path}: {e}")
+        return None
+
+async def build_snapshot(csv_path: str, snapshot_path: str = SNAPSHOT_FILE_PATH) -> int:
+    # Imported here so loading a snapshot never pulls in the pandas based CSV parser
+    from services.question_loader_service import load_questions_from_csv
+
+    questions = await load_questions_from_csv(csv_path)
+    if not questions:
+        raise ValueError(f"No questions could be parsed from {csv_path}")
+    write_snapshot(questions, csv_path, snapshot_path)
+    return len(questions)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from services.question_loader_service import CSV_FILE_PATH
+
+    parser = argparse.ArgumentParser(description="Compile the question bank CSV into a binary snapshot")
+    parser.add_argument("--csv", default=CSV_FILE_PATH, help="Source question bank CSV")
+    parser.add_argument("--out", default=SNAPSHOT_FILE_PATH, help="Snapshot file to write")
+    parser.add_argument("--check", action="store_true", help="Only report whether the snapshot is fresh")
+    args = parser.parse_args(argv)
+
+    if args.check:
+        questions = load_snapshot(args.out, args.csv)
+        if questions is None:
+            print(f"{args.out} is missing or stale")
+            return 1
+        print(f"{args.out} is fresh ({len(questions)} questions)")
+        return 0
+
+    count = asyncio.run(build_snapshot(args.csv, args.out))
+    print(f"Wrote {count} questions to {args.out}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
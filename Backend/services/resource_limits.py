@@ -0,0 +1,78 @@
+# services/resource_limits.py
+#
+# Resource profile (CPU time, wall time, memory) for running a question's test cases.
+# A question's own limits win; anything it leaves unset comes from its difficulty.
+
+import json
+import os
+from typing import Optional
+from dotenv import load_dotenv
+from models.code_evaluation_model import Question
+
+load_dotenv()
+
+# Judge0 units: seconds and KB. Tight limits on easy questions hand executor capacity back sooner.
+# Override with DIFFICULTY_RESOURCE_LIMITS, e.g. {"easy": {"cpu_time_limit": 0.5}}
+DEFAULT_DIFFICULTY_LIMITS = {
+    "easy": {"cpu_time_limit": 1.0, "wall_time_limit": 3.0, "memory_limit": 128000},
+    "moderate": {"cpu_time_limit": 2.0, "wall_time_limit": 5.0, "memory_limit": 256000},
+    "medium": {"cpu_time_limit": 2.0, "wall_time_limit": 5.0, "memory_limit": 256000},
+    "hard": {"cpu_time_limit": 5.0, "wall_time_limit": 10.0, "memory_limit": 512000},
+}
+FALLBACK_LIMITS = {"cpu_time_limit": 2.0, "wall_time_limit": 5.0, "memory_limit": 256000}
+
+_overrides = {
+    difficulty.lower(): limits
+    for difficulty, limits in json.loads(os.getenv("DIFFICULTY_RESOURCE_LIMITS", "{}")).items()
+}
+DIFFICULTY_LIMITS = {
+    difficulty: {**DEFAULT_DIFFICULTY_LIMITS.get(difficulty, FALLBACK_LIMITS), **_overrides.get(difficulty, {})}
+    for difficulty in {*DEFAULT_DIFFICULTY_LIMITS, *_overrides}
+}
+
+# Managed runtimes spend a good part of a tight limit on start-up (JVM, Mono): their runs get the
+# question's times multiplied by "time" and "memory_kb" extra KB. Keyed by Judge0 language id;
+# override with LANGUAGE_RESOURCE_SCALING, e.g. {"62": {"time": 1.5}}
+DEFAULT_LANGUAGE_SCALING = {
+    62: {"time": 2.0, "memory_kb": 128000},  # Java
+    51: {"time": 2.0, "memory_kb": 64000},   # C#
+}
+LANGUAGE_SCALING = {**DEFAULT_LANGUAGE_SCALING}
+for _language_id, _scaling in json.loads(os.getenv("LANGUAGE_RESOURCE_SCALING", "{}")).items():
+    LANGUAGE_SCALING[int(_language_id)] = {**DEFAULT_LANGUAGE_SCALING.get(int(_language_id), {}), **_scaling}
+# Upper bounds a Judge0 deployment accepts by default (max_cpu_time_limit etc.); scaled limits stop here
+MAX_CPU_TIME_LIMIT = float(os.getenv("MAX_CPU_TIME_LIMIT", "15"))
+MAX_WALL_TIME_LIMIT = float(os.getenv("MAX_WALL_TIME_LIMIT", "20"))
+MAX_MEMORY_LIMIT_KB = int(os.getenv("MAX_MEMORY_LIMIT_KB", "512000"))
+
+# Time on top of the wall limit a caller waits for results (queueing, compilation, transport)
+EXECUTION_DEADLINE_SLACK_SECONDS = float(os.getenv("EXECUTION_DEADLINE_SLACK_SECONDS", "10"))
+
+
+def limits_for_question(question: Question, language_id: Optional[int] = None) -> dict:
+    """
+    cpu_time_limit / wall_time_limit (seconds) and memory_limit (KB) for a question's runs,
+    scaled for language_id when it is a managed runtime.
+    """
+    defaults = DIFFICULTY_LIMITS.get((question.difficultylevel or "").strip().lower(), FALLBACK_LIMITS)
+    limits = {
+        "cpu_time_limit": question.cpu_time_limit or defaults["cpu_time_limit"],
+        "wall_time_limit": question.wall_time_limit or defaults["wall_time_limit"],
+        "memory_limit": question.memory_limit or defaults["memory_limit"]
+    }
+    scaling = LANGUAGE_SCALING.get(language_id)
+    if scaling:
+        time_factor = scaling.get("time", 1.0)
+        limits = {
+            "cpu_time_limit": min(limits["cpu_time_limit"] * time_factor, MAX_CPU_TIME_LIMIT),
+            "wall_time_limit": min(limits["wall_time_limit"] * time_factor, MAX_WALL_TIME_LIMIT),
+            "memory_limit": min(limits["memory_limit"] + int(scaling.get("memory_kb", 0)), MAX_MEMORY_LIMIT_KB)
+        }
+    return limits
+
+
+def execution_deadline(limits: Optional[dict]) -> Optional[float]:
+    """How long to wait for a round of runs under these limits."""
+    if not limits or not limits.get("wall_time_limit"):
+        return None
+    return limits["wall_time_limit"] + EXECUTION_DEADLINE_SLACK_SECONDS
@@ -0,0 +1,558 @@
+# services/sandbox.py
+#
+# Sandboxing helpers for running untrusted submissions on this host.
+# Stdlib only: the file is also executed directly, either as a one-off runner of a single
+# job (python -I -S sandbox.py --job), as the launcher of a compiled program or compiler
+# (python -I -S sandbox.py --exec ...), as the interpreter of a Python submission
+# (python -I -S sandbox.py --run ...) or as a warm fork server (python -I -S sandbox.py
+# --serve), so it must not import anything from the application. One-off and warm runs
+# go through the same run_job, so they measure and report programs the same way.
+
+import ctypes
+import json
+import os
+import platform
+import resource
+import selectors
+import shutil
+import signal
+import struct
+import sys
+import tempfile
+import time
+
+SCRIPT_PATH = os.path.abspath(__file__)
+# Minimal environment for sandboxed interpreters, nothing from the server leaks in
+SANDBOX_ENV = {"PATH": "/usr/bin:/bin", "PYTHONIOENCODING": "utf-8", "LANG": "C.UTF-8"}
+
+# clone(2) flags: every sandboxed program gets its own mounts, network (a downed loopback only) and IPC
+CLONE_NEWNS = 0x00020000
+CLONE_NEWIPC = 0x08000000
+CLONE_NEWUSER = 0x10000000
+CLONE_NEWNET = 0x40000000
+# mount(2) / umount2(2) flags
+MS_RDONLY = 0x1
+MS_NOSUID = 0x2
+MS_NODEV = 0x4
+MS_NOEXEC = 0x8
+MS_REMOUNT = 0x20
+MS_BIND = 0x1000
+MS_REC = 0x4000
+MS_PRIVATE = 0x40000
+MNT_DETACH = 0x2
+# prctl(2) options
+PR_SET_PDEATHSIG = 1
+PR_SET_NO_NEW_PRIVS = 38
+# capset(2) header version
+LINUX_CAPABILITY_VERSION_3 = 0x20080522
+# pivot_root(2) has no libc wrapper
+SYS_PIVOT_ROOT = {"x86_64": 155, "aarch64": 41}.get(platform.machine())
+
+# Unprivileged identity programs run as (nobody)
+SANDBOX_UID = SANDBOX_GID = 65534
+# Where each sandbox mounts its private root file system, inside its own mount namespace
+SANDBOX_ROOT = os.path.join(tempfile.gettempdir(), "sandbox-root")
+# Host paths visible (read-only) inside the sandbox. Nothing else exists there: not the
+# application or its .env, not home directories, not /proc
+SANDBOX_SYSTEM_PATHS = (
+    "/usr", "/bin", "/sbin", "/lib", "/lib32", "/lib64", "/libx32",
+    "/etc/alternatives", "/etc/ld.so.cache", "/etc/ld.so.conf", "/etc/ld.so.conf.d",
+    "/etc/passwd", "/etc/group", "/etc/localtime",
+    # The interpreter's standard library, wherever Python is installed
+    sys.base_prefix
+)
+SANDBOX_DEVICES = ("/dev/null", "/dev/zero", "/dev/random", "/dev/urandom")
+# Scratch space for programs (a tmpfs, gone with the sandbox)
+SANDBOX_TMP_SIZE = "16m"
+# File name Python submissions are saved and run under, in their work directory
+PROGRAM_NAME = "main.py"
+# Exit status of a child that could not be isolated and refused to run the program
+ISOLATION_FAILED_EXIT = 125
+ISOLATION_FAILED_MESSAGE = "Sandbox isolation is unavailable"
+
+_libc = ctypes.CDLL(None, use_errno=True)
+
+def apply_limits(cpu_seconds: float, memory_bytes: int, file_size_bytes: int, max_open_files: int = 64) -> None:
+    """Apply rlimits to the current process, right before the untrusted program starts."""
+    cpu = max(1, int(cpu_seconds + 0.999))
+    # Soft limit sends SIGXCPU, the hard limit one second later kills for good
+    resource.setrlimit(resource.RLIMIT_CPU, (cpu, cpu + 1))
+    if memory_bytes:
+        resource.setrlimit(resource.RLIMIT_AS, (memory_bytes, memory_bytes))
+    resource.setrlimit(resource.RLIMIT_FSIZE, (file_size_bytes, file_size_bytes))
+    resource.setrlimit(resource.RLIMIT_NOFILE, (max_open_files, max_open_files))
+    resource.setrlimit(resource.RLIMIT_CORE, (0, 0))
+
+def _check(result: int, what: str) -> None:
+    if result != 0:
+        errno = ctypes.get_errno()
+        raise OSError(errno, f"{what}: {os.strerror(errno)}")
+
+def _mount(source, target: str, fstype, flags: int, data=None) -> None:
+    encode = lambda value: value.encode() if value is not None else None
+    _check(_libc.mount(encode(source), encode(target), encode(fstype), ctypes.c_ulong(flags), encode(data)),
+           f"mount {target}")
+
+def _write_file(path: str, data: str) -> None:
+    with open(path, "w") as f:
+        f.write(data)
+
+def _bind(source: str, root: str, writable: bool = False, device: bool = False) -> None:
+    """Make a host path visible at the same path below root, read-only unless writable."""
+    target = root + source
+    os.makedirs(os.path.dirname(target), mode=0o755, exist_ok=True)
+    if os.path.islink(source):
+        # /bin -> usr/bin and friends: recreate the link, its target is bound on its own
+        os.symlink(os.readlink(source), target)
+        return
+    if os.path.isdir(source):
+        os.makedirs(target, mode=0o755, exist_ok=True)
+    else:
+        open(target, "a").close()
+    _mount(source, target, None, MS_BIND | MS_REC)
+    flags = MS_BIND | MS_REMOUNT | MS_NOSUID | (0 if device else MS_NODEV) | (0 if writable else MS_RDONLY)
+    # Keep the restrictions the host mount already has; a user namespace may not lift them
+    flags |= os.statvfs(target).f_flag & (MS_RDONLY | MS_NOSUID | MS_NODEV | MS_NOEXEC)
+    _mount(None, target, None, flags)
+
+def _drop_capabilities() -> None:
+    # Inside a user namespace the process holds every capability of that namespace until now
+    class Header(ctypes.Structure):
+        _fields_ = [("version", ctypes.c_uint32), ("pid", ctypes.c_int)]
+
+    class Data(ctypes.Structure):
+        _fields_ = [("effective", ctypes.c_uint32), ("permitted", ctypes.c_uint32),
+                    ("inheritable", ctypes.c_uint32)]
+
+    _check(_libc.capset(ctypes.byref(Header(LINUX_CAPABILITY_VERSION_3, 0)), (Data * 2)()), "capset")
+
+def isolate(workdir: str, readonly_paths: tuple = ()) -> None:
+    """
+    Confine the current process before it runs untrusted code: new mount, network and IPC
+    namespaces, a private root file system holding only the system paths, readonly_paths and
+    the (writable) work directory, all at their host paths, and no privileges left (nobody
+    when started as root, an unprivileged user namespace otherwise). Raises OSError when the
+    host cannot provide that; callers must then refuse to run the program.
+    Must be called while the process is still single threaded.
+    """
+    if SYS_PIVOT_ROOT is None:
+        raise OSError(f"pivot_root is not supported on {platform.machine()}")
+    uid, gid = os.getuid(), os.getgid()
+    namespaces = CLONE_NEWNS | CLONE_NEWNET | CLONE_NEWIPC
+    _check(_libc.unshare(namespaces if uid == 0 else namespaces | CLONE_NEWUSER), "unshare")
+    if uid == 0:
+        os.chown(workdir, SANDBOX_UID, SANDBOX_GID)
+    else:
+        # Only this user exists in the new namespace, as nobody
+        _write_file("/proc/self/setgroups", "deny")
+        _write_file("/proc/self/uid_map", f"{SANDBOX_UID} {uid} 1")
+        _write_file("/proc/self/gid_map", f"{SANDBOX_GID} {gid} 1")
+    # Nothing mounted from here on may show up on the host
+    _mount(None, "/", None, MS_REC | MS_PRIVATE)
+
+    root = SANDBOX_ROOT
+    os.makedirs(root, mode=0o755, exist_ok=True)
+    _mount("tmpfs", root, "tmpfs", MS_NOSUID | MS_NODEV, "size=1m,mode=755")
+    os.mkdir(root + "/tmp")
+    _mount("tmpfs", root + "/tmp", "tmpfs", MS_NOSUID | MS_NODEV, f"size={SANDBOX_TMP_SIZE},mode=1777")
+    bound = []
+    for path, writable in [(workdir, True)] + [(p, False) for p in (*SANDBOX_SYSTEM_PATHS, *readonly_paths)]:
+        path = os.path.normpath(path)
+        if not os.path.lexists(path) or any(path == b or path.startswith(b + "/") for b in bound):
+            continue
+        _bind(path, root, writable)
+        bound.append(path)
+    for device in SANDBOX_DEVICES:
+        _bind(device, root, writable=True, device=True)
+
+    # Swap the root and detach the host's; there is no way back to it afterwards
+    os.chdir(root)
+    os.mkdir("old-root")
+    _check(_libc.syscall(SYS_PIVOT_ROOT, b".", b"old-root"), "pivot_root")
+    os.chdir("/")
+    _check(_libc.umount2(b"/old-root", MNT_DETACH), "umount old root")
+    os.rmdir("/old-root")
+    _mount(None, "/", None, MS_REMOUNT | MS_RDONLY | MS_NOSUID | MS_NODEV)
+    os.chdir(workdir)
+
+    _check(_libc.prctl(PR_SET_NO_NEW_PRIVS, 1, 0, 0, 0), "prctl")
+    if uid == 0:
+        os.setgroups([])
+        os.setresgid(SANDBOX_GID, SANDBOX_GID, SANDBOX_GID)
+        os.setresuid(SANDBOX_UID, SANDBOX_UID, SANDBOX_UID)
+    else:
+        _drop_capabilities()
+
+def isolate_or_exit(workdir: str, readonly_paths: tuple = ()) -> None:
+    """isolate(), or end the process without running anything when isolation is unavailable."""
+    try:
+        isolate(workdir, readonly_paths)
+    except OSError as e:
+        print(f"{ISOLATION_FAILED_MESSAGE}, refusing to run the program: {e}", file=sys.stderr)
+        sys.stderr.flush()
+        os._exit(ISOLATION_FAILED_EXIT)
+
+def check_isolation() -> int:
+    """Exit status of a trial isolation in a throwaway child: 0 when it works and hides the application."""
+    workdir = tempfile.mkdtemp(prefix="sandbox-")
+    pid = os.fork()
+    if pid == 0:
+        try:
+            isolate(workdir)
+            os._exit(1 if os.path.exists(SCRIPT_PATH) else 0)
+        finally:
+            os._exit(1)
+    _, status = os.waitpid(pid, 0)
+    shutil.rmtree(workdir, ignore_errors=True)
+    return os.waitstatus_to_exitcode(status)
+
+def isolation_available() -> bool:
+    """True when programs can be isolated on this host (python sandbox.py --check succeeds)."""
+    import subprocess
+    try:
+        return subprocess.run(
+            [sys.executable, "-I", "-S", SCRIPT_PATH, "--check"], env=SANDBOX_ENV,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=30
+        ).returncode == 0
+    except (OSError, subprocess.SubprocessError):
+        return False
+
+def report_exception(e: BaseException, filename: str) -> None:
+    # Print the traceback from the submission's own frames only, not the sandbox's
+    import traceback
+    tb = e.__traceback__
+    while tb is not None and tb.tb_frame.f_code.co_filename != filename:
+        tb = tb.tb_next
+    traceback.print_exception(type(e), e, tb)
+    sys.stderr.flush()
+
+def run_program(path: str, cpu_seconds: float, memory_bytes: int, file_size_bytes: int) -> None:
+    """Lock this fresh interpreter down, then run the program at path as __main__."""
+    import runpy
+    # Isolation first: unshare(CLONE_NEWUSER) needs a single threaded process, which we still are
+    isolate_or_exit(os.path.dirname(os.path.abspath(path)))
+    apply_limits(cpu_seconds, memory_bytes, file_size_bytes)
+    sys.argv = [path]
+    try:
+        runpy.run_path(path, run_name="__main__")
+    except SystemExit:
+        raise
+    except BaseException as e:
+        report_exception(e, path)
+        os._exit(1)
+
+class OutputMatcher:
+    """
+    Incremental check that a program's stdout can still equal the expected output once
+    both are stripped of surrounding whitespace (the comparison the evaluator makes).
+    mismatch turns True on the first byte that rules equality out. Bytes whose meaning
+    as whitespace differs between bytes.strip and str.strip switch the check off instead.
+    """
+
+    AMBIGUOUS = frozenset(range(0x1c, 0x20)) | frozenset(range(0x80, 0x100))
+
+    def __init__(self, expected: str):
+        self.expected = expected.strip().encode("utf-8")
+        self.position = 0
+        self.started = False
+        self.enabled = True
+        self.mismatch = False
+
+    def _ambiguous(self, data: bytes) -> bool:
+        return any(byte in self.AMBIGUOUS for byte in data)
+
+    def feed(self, chunk: bytes) -> bool:
+        """Returns False once the output can no longer match."""
+        if not self.enabled or self.mismatch:
+            return not self.mismatch
+        if not self.started:
+            chunk = chunk.lstrip()
+            if not chunk:
+                return True
+            self.started = True
+            if self.expected[:1] != chunk[:1] and self._ambiguous(chunk[:1]):
+                self.enabled = False
+                return True
+        size = min(len(chunk), len(self.expected) - self.position)
+        if chunk[:size] != self.expected[self.position:self.position + size]:
+            self.mismatch = True
+            return False
+        self.position += size
+        # Past the end of the expected output only whitespace may follow
+        rest = chunk[size:].strip()
+        if rest:
+            if self._ambiguous(rest):
+                self.enabled = False
+                return True
+            self.mismatch = True
+            return False
+        return True
+
+
+def exec_program(argv: list, cpu_seconds: float, memory_bytes: int, file_size_bytes: int) -> None:
+    """Lock the current process down, then replace it with a native program (compiler or binary)."""
+    # The program, and any absolute path it is given (class path, assembly), must exist in the private root
+    readonly_paths = (os.path.dirname(os.path.realpath(argv[0])),
+                      *(arg for arg in argv[1:] if os.path.isabs(arg) and os.path.exists(arg)))
+    isolate_or_exit(os.getcwd(), readonly_paths)
+    apply_limits(cpu_seconds, memory_bytes, file_size_bytes)
+    try:
+        os.execvpe(argv[0], argv, SANDBOX_ENV)
+    except OSError as e:
+        print(f"Failed to start {argv[0]}: {e}", file=sys.stderr)
+        sys.stderr.flush()
+        os._exit(127)
+
+
+# === Warm fork server ===
+#
+# A long-lived, single threaded process that has already paid for its own startup. For
+# every job it forks a child that replaces itself with the program (a fresh interpreter
+# for Python), which then locks itself down. Nothing of the server's memory, such as the
+# expected output of this or an earlier job, is left for the submission to read.
+# Protocol on the server's stdin/stdout: 4-byte big-endian length + JSON body.
+
+def _read_exact(fd: int, size: int):
+    buf = b""
+    while len(buf) < size:
+        chunk = os.read(fd, size - len(buf))
+        if not chunk:
+            return None
+        buf += chunk
+    return buf
+
+def _read_frame(fd: int):
+    header = _read_exact(fd, 4)
+    if header is None:
+        return None
+    body = _read_exact(fd, struct.unpack(">I", header)[0])
+    return None if body is None else json.loads(body)
+
+def _write_frame(fd: int, data: dict) -> None:
+    body = json.dumps(data).encode("utf-8")
+    view = memoryview(struct.pack(">I", len(body)) + body)
+    while view:
+        written = os.write(fd, view)
+        view = view[written:]
+
+def _exec_in_child(job: dict) -> None:
+    """Runs in the forked child: exec the program, which locks itself down before it starts."""
+    if job.get("argv"):
+        exec_program(job["argv"], job["cpu_seconds"], job["memory_bytes"], job["file_size_bytes"])
+    # A fresh interpreter, never the server's: its memory holds the job, expected output included
+    limits = [str(job["cpu_seconds"]), str(job["memory_bytes"]), str(job["file_size_bytes"])]
+    os.execve(sys.executable, [sys.executable, "-I", "-S", SCRIPT_PATH, "--run", PROGRAM_NAME, *limits],
+              SANDBOX_ENV)
+
+def _pump(pid: int, stdin_fd: int, stdin_data: bytes, stdout_fd: int, stderr_fd: int,
+          deadline: float, max_output: int, expected: str = None) -> dict:
+    # Feed stdin and collect capped stdout/stderr until the child closes them or the deadline passes.
+    # With an expected output the child is killed as soon as its stdout diverges from it.
+    matcher = OutputMatcher(expected) if expected is not None else None
+    outputs = {stdout_fd: bytearray(), stderr_fd: bytearray()}
+    timed_out = overflow = False
+    selector = selectors.DefaultSelector()
+    for fd in (stdout_fd, stderr_fd):
+        selector.register(fd, selectors.EVENT_READ)
+    pending_stdin = memoryview(stdin_data)
+    if pending_stdin:
+        os.set_blocking(stdin_fd, False)
+        selector.register(stdin_fd, selectors.EVENT_WRITE)
+    else:
+        os.close(stdin_fd)
+        stdin_fd = None
+
+    while len(selector.get_map()) > (1 if stdin_fd is not None else 0):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            timed_out = True
+            break
+        for key, _ in selector.select(timeout=remaining):
+            fd = key.fd
+            if fd == stdin_fd:
+                try:
+                    written = os.write(fd, pending_stdin[:65536])
+                    pending_stdin = pending_stdin[written:]
+                except BrokenPipeError:
+                    pending_stdin = pending_stdin[:0]
+                if not pending_stdin:
+                    selector.unregister(fd)
+                    os.close(fd)
+                    stdin_fd = None
+                continue
+            chunk = os.read(fd, 65536)
+            if not chunk:
+                selector.unregister(fd)
+                continue
+            outputs[fd] += chunk
+            if fd == stdout_fd and matcher is not None and not matcher.feed(chunk):
+                break
+            if len(outputs[fd]) > max_output:
+                # Either stream over the limit ends the program, a blocked writer would only time out
+                del outputs[fd][max_output:]
+                overflow = True
+                break
+        if overflow or (matcher is not None and matcher.mismatch):
+            break
+
+    mismatch = matcher is not None and matcher.mismatch
+    if timed_out or overflow or mismatch:
+        try:
+            os.killpg(pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+    selector.close()
+    for fd in (stdin_fd, stdout_fd, stderr_fd):
+        if fd is not None:
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+    return {
+        "stdout": bytes(outputs[stdout_fd]).decode("utf-8", errors="replace"),
+        "stderr": bytes(outputs[stderr_fd]).decode("utf-8", errors="replace"),
+        "timed_out": timed_out,
+        "overflow": overflow,
+        "mismatch": mismatch
+    }
+
+def _reap(pid: int, deadline: float) -> tuple:
+    """
+    Wait for the child until the deadline, then kill its whole session. A program that closes
+    its output early still counts against the wall limit. Returns (status, rusage, timed_out).
+    """
+    delay = 0.001
+    timed_out = False
+    while True:
+        reaped, status, usage = os.wait4(pid, os.WNOHANG)
+        if reaped:
+            break
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            timed_out = True
+            try:
+                os.killpg(pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+            _, status, usage = os.wait4(pid, 0)
+            break
+        time.sleep(min(delay, remaining))
+        delay = min(delay * 2, 0.05)
+    # Anything the program left behind in its session goes too
+    try:
+        os.killpg(pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        pass
+    return status, usage, timed_out
+
+def run_job(job: dict) -> dict:
+    """Fork a child for one job and report its output, exit status and resource usage."""
+    # Compile jobs run in the artifact directory, everything else in a throwaway one
+    workdir = job.get("cwd") or tempfile.mkdtemp(prefix="sandbox-")
+    if not job.get("argv"):
+        with open(os.path.join(workdir, PROGRAM_NAME), "w", encoding="utf-8") as f:
+            f.write(job["code"])
+    stdin_r, stdin_w = os.pipe()
+    stdout_r, stdout_w = os.pipe()
+    stderr_r, stderr_w = os.pipe()
+    parent = os.getpid()
+    pid = os.fork()
+    if pid == 0:
+        try:
+            os.setsid()
+            # Die with the server (or harness) instead of outliving it when it is killed
+            ctypes.CDLL(None).prctl(PR_SET_PDEATHSIG, signal.SIGKILL)
+            if os.getppid() != parent:
+                os._exit(137)
+            os.dup2(stdin_r, 0)
+            os.dup2(stdout_w, 1)
+            os.dup2(stderr_w, 2)
+            # Drop every other descriptor, including the server's protocol pipes
+            os.closerange(3, 1024)
+            os.chdir(workdir)
+            _exec_in_child(job)
+        finally:
+            os._exit(127)
+
+    os.close(stdin_r)
+    os.close(stdout_w)
+    os.close(stderr_w)
+    deadline = time.monotonic() + job["wall_seconds"]
+    try:
+        result = _pump(pid, stdin_w, job["stdin"].encode("utf-8"), stdout_r, stderr_r,
+                       deadline, job["max_output_bytes"], job.get("expected_output"))
+        status, usage, timed_out = _reap(pid, deadline)
+    finally:
+        if not job.get("cwd"):
+            shutil.rmtree(workdir, ignore_errors=True)
+    result.update({
+        "timed_out": result["timed_out"] or timed_out,
+        "returncode": os.waitstatus_to_exitcode(status),
+        "cpu_time": usage.ru_utime + usage.ru_stime,
+        "memory_kb": usage.ru_maxrss
+    })
+    return result
+
+
+# === Multi-test harness ===
+#
+# Runs one Python submission against every test input from a single trusted process: a
+# fresh child is forked per test (run_job), and this process collects each child's output
+# and exit status and reports them. The submission never holds a descriptor the results
+# travel through, so it cannot write results of its own.
+
+def run_harness(job: dict) -> dict:
+    """Run job["code"] once per job["stdins"] entry, each in its own child. Returns {"results": [...]}."""
+    expected_outputs = job.get("expected_outputs") or [None] * len(job["stdins"])
+    results = []
+    for stdin, expected in zip(job["stdins"], expected_outputs):
+        test = {
+            "code": job["code"],
+            "stdin": stdin,
+            "cpu_seconds": job["test_cpu_seconds"],
+            "memory_bytes": job["memory_bytes"],
+            "file_size_bytes": job["file_size_bytes"],
+            "wall_seconds": job["test_wall_seconds"],
+            "max_output_bytes": job["test_output_bytes"]
+        }
+        if expected is not None:
+            test["expected_output"] = expected
+        results.append(run_job(test))
+    return {"results": results}
+
+def run(job: dict) -> dict:
+    """A single run (run_job) or, when the job has "stdins", a multi-test harness run."""
+    return run_harness(job) if job.get("stdins") is not None else run_job(job)
+
+def serve() -> None:
+    """Fork server loop: one job frame in, one result frame out, until stdin closes."""
+    # Keep the protocol off fds 0/1 so nothing a child inherits can touch it
+    proto_in, proto_out = os.dup(0), os.dup(1)
+    devnull = os.open(os.devnull, os.O_RDWR)
+    os.dup2(devnull, 0)
+    os.dup2(devnull, 1)
+    _write_frame(proto_out, {"ready": True})
+    while True:
+        job = _read_frame(proto_in)
+        if job is None:
+            return
+        try:
+            result = run(job)
+        except Exception as e:
+            result = {"error": f"{type(e).__name__}: {e}"}
+        _write_frame(proto_out, result)
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ["--serve"]:
+        serve()
+    elif sys.argv[1:] == ["--check"]:
+        sys.exit(check_isolation())
+    elif sys.argv[1:] == ["--job"]:
+        # python -I -S sandbox.py --job, job JSON on stdin, result JSON on stdout
+        sys.stdout.write(json.dumps(run(json.loads(sys.stdin.read()))))
+    elif sys.argv[1:2] == ["--exec"]:
+        # python -I -S sandbox.py --exec <cpu_seconds> <memory_bytes> <file_size_bytes> <program> [args...]
+        exec_program(sys.argv[5:], float(sys.argv[2]), int(sys.argv[3]), int(sys.argv[4]))
+    elif sys.argv[1:2] == ["--run"]:
+        # python -I -S sandbox.py --run <program.py> <cpu_seconds> <memory_bytes> <file_size_bytes>
+        run_program(sys.argv[2], float(sys.argv[3]), int(sys.argv[4]), int(sys.argv[5]))
@@ -1,79 +1,463 @@
 # services/solution_evaluation_service.py
 
 import os
+import json
 import httpx
+import random
 import asyncio
 from dotenv import load_dotenv
 from logging_config import logger
-from utils.key_rotator import rotate_judge0_keys  
+from typing import List, Optional
+from utils.key_rotator import is_upstream_failure, rotate_judge0_keys, rotate_judge0_batch_keys
+from utils.retry import retry_async, send_checked
+from utils.circuit_breaker import CircuitOpenError
+from utils.http_client import get_http_client
+from utils.metrics import register_provider
+from utils.cache import TieredCache, cache_key
+from utils.output import MAX_RESULT_OUTPUT_CHARS, stdout_digest, truncate_output
+from services import judge0_callback_service
+from services.execution_backend import ExecutionBackend, STATUS_COMPILATION_ERROR
+from services.compilation_service import CompileFailureCache, is_compiled_language
+from services.judge0_router import Judge0Endpoint, Judge0Router, endpoints_from_env
+from services.local_execution_service import LocalSubprocessBackend
 
 # Load environment variables
 load_dotenv()
 
-# Base URL (don't include submission params here)
-BASE_URL = "https://judge0-ce.p.rapidapi.com"
+# Base URL (don't include submission params here); point it at a self-hosted Judge0 or a local stand-in if needed.
+# Used when JUDGE0_BACKENDS is not set; JUDGE0_BACKENDS routes across several deployments (services/judge0_router.py)
+BASE_URL = os.getenv("JUDGE0_BASE_URL", "https://judge0-ce.p.rapidapi.com").rstrip("/")
 JUDGE0_API_HOST = os.getenv("JUDGE0_API_HOST")
+# Submit all test cases through /submissions/batch; set to "false" to run them as concurrent single submissions
+JUDGE0_USE_BATCH = os.getenv("JUDGE0_USE_BATCH", "true").lower() == "true"
+# Maximum concurrent single submissions per Judge0 host, shared by every request in the process.
+# JUDGE0_HOST_CONCURRENCY overrides it per host, e.g. {"judge0-ce.p.rapidapi.com": 2}
+JUDGE0_MAX_CONCURRENCY = int(os.getenv("JUDGE0_MAX_CONCURRENCY", "5"))
+JUDGE0_HOST_CONCURRENCY = json.loads(os.getenv("JUDGE0_HOST_CONCURRENCY", "{}"))
+# Adaptive polling: first poll after JUDGE0_POLL_INITIAL_DELAY seconds, then delays grow by
+# JUDGE0_POLL_BACKOFF up to JUDGE0_POLL_MAX_DELAY; a run is reported as timed out after JUDGE0_POLL_DEADLINE
+JUDGE0_POLL_INITIAL_DELAY = float(os.getenv("JUDGE0_POLL_INITIAL_DELAY", "0.1"))
+JUDGE0_POLL_BACKOFF = float(os.getenv("JUDGE0_POLL_BACKOFF", "1.6"))
+JUDGE0_POLL_MAX_DELAY = float(os.getenv("JUDGE0_POLL_MAX_DELAY", "2.0"))
+JUDGE0_POLL_DEADLINE = float(os.getenv("JUDGE0_POLL_DEADLINE", "15"))
+# Submit with wait=true so Judge0 answers with the finished result (good for short programs, no polling)
+JUDGE0_WAIT_MODE = os.getenv("JUDGE0_WAIT_MODE", "false").lower() == "true"
+# Public URL of the /internal/judge0/callback route; when set together with JUDGE0_CALLBACK_SECRET
+# Judge0 pushes results (the secret is added to the URL) and polling slows down to one round every
+# JUDGE0_CALLBACK_POLL_INTERVAL seconds, which still catches callbacks that get lost.
+# Callbacks are matched in process memory: run a single worker or route them to the submitting one
+JUDGE0_CALLBACK_URL = os.getenv("JUDGE0_CALLBACK_URL")
+JUDGE0_CALLBACK_POLL_INTERVAL = float(os.getenv("JUDGE0_CALLBACK_POLL_INTERVAL", "3"))
+# Judge0 compiles every submission it receives. When enabled, C, C++, Java and C# run the first
+# test case alone and stop there on a compilation error instead of compiling once per test case.
+# Off by default: it costs a serial round trip on every submission that does compile
+JUDGE0_COMPILE_PROBE = os.getenv("JUDGE0_COMPILE_PROBE", "false").lower() == "true"
+# Where code runs: "judge0", "local" (sandboxed on this host: Python, plus C/C++/Java/C# when the
+# toolchain is installed) or "auto" (local for the languages it supports, Judge0 for the rest)
+EXECUTION_BACKEND = os.getenv("EXECUTION_BACKEND", "judge0").lower()
+# Results of identical (language, source, stdin, limits) runs are reused for EXECUTION_CACHE_TTL_SECONDS.
+# EXECUTION_CACHE_DB_PATH adds an on-disk SQLite tier that survives restarts and is shared by workers.
+EXECUTION_CACHE_ENABLED = os.getenv("EXECUTION_CACHE_ENABLED", "true").lower() == "true"
+EXECUTION_CACHE_SIZE = int(os.getenv("EXECUTION_CACHE_SIZE", "2048"))
+EXECUTION_CACHE_TTL_SECONDS = float(os.getenv("EXECUTION_CACHE_TTL_SECONDS", "3600"))
+EXECUTION_CACHE_DB_PATH = os.getenv("EXECUTION_CACHE_DB_PATH")
+# Only deterministic outcomes are cached: accepted, wrong answer, compilation and runtime errors.
+# Time limits, internal errors and transport failures may well pass on the next attempt.
+CACHEABLE_STATUS_IDS = {3, 4, 6, 7, 8, 9, 10, 11, 12}
+# Fields requested when fetching results; stdin and source_code are ours already, never download them again
+RESULT_FIELDS = "stdout,stderr,compile_output,message,status,language_id,cpu_time_limit,memory_limit,time,memory"
 
-async def evaluate_code(code: str, language_id: int, stdin: str) -> dict:
+def poll_delay(attempt: int) -> float:
+    """Delay before poll number attempt (0-based): short first wait, then exponential growth with jitter."""
+    delay = min(JUDGE0_POLL_MAX_DELAY, JUDGE0_POLL_INITIAL_DELAY * (JUDGE0_POLL_BACKOFF ** attempt))
+    return delay * random.uniform(0.8, 1.2)
+
+def _limit_fields(limits: Optional[dict]) -> dict:
+    # Per-run resource limits in Judge0's own field names; unset ones keep the Judge0 defaults
+    return {key: limits[key] for key in ("cpu_time_limit", "wall_time_limit", "memory_limit") if (limits or {}).get(key)}
+
+def _use_callback() -> bool:
+    # wait=true already returns the result, a callback would only duplicate it. Without a secret
+    # the callback route refuses every call, so results are polled
+    return bool(JUDGE0_CALLBACK_URL) and bool(judge0_callback_service.JUDGE0_CALLBACK_SECRET) and not JUDGE0_WAIT_MODE
+
+async def judge0_evaluate_code(code: str, language_id: int, stdin: str, deadline: Optional[float] = None,
+                               limits: Optional[dict] = None, endpoint: Optional[Judge0Endpoint] = None) -> dict:
     """
     Evaluate code using Judge0 with key rotation support.
+    deadline is the number of seconds to wait for the result before reporting a timeout.
+    limits (cpu_time_limit, wall_time_limit, memory_limit) are sent with the submission.
+    endpoint is the Judge0 deployment to use (the first configured one by default).
     """
+    endpoint = endpoint or judge0_router.endpoints[0]
     payload = {
         "language_id": language_id,
         "source_code": code,
-        "stdin": stdin
+        "stdin": stdin,
+        **_limit_fields(limits)
     }
+    if _use_callback():
+        payload["callback_url"] = judge0_callback_service.callback_url(JUDGE0_CALLBACK_URL)
     print(payload)
     logger.info(f"Submitting code to Judge0 (language_id={language_id})")
 
+    token = None
     try:
-        # Submit code using key rotation
-        submit_result = await rotate_judge0_keys(payload, JUDGE0_API_HOST) #API fallback
+        loop = asyncio.get_running_loop()
+        deadline_at = loop.time() + (deadline or JUDGE0_POLL_DEADLINE)
+
+        # Submit code using key rotation; in wait mode Judge0 answers with the finished result
+        submit_result = await rotate_judge0_keys(
+            payload, endpoint.host, wait=JUDGE0_WAIT_MODE, fields=RESULT_FIELDS, base_url=endpoint.base_url,
+            key_pool=endpoint.key_pool, auth_header=endpoint.auth_header
+        ) #API fallback
         
         token = submit_result.get("token")
         used_key = submit_result.get("used_key")
 
+        result = submit_result.get("result") or {}
+        if result.get("status", {}).get("id", 0) not in [0, 1, 2]:
+            logger.info("Judge0 returned the result synchronously (wait=true).")
+            return validate_and_clean_judge0_response(result)
+
         if not token:
             logger.error("No token received from Judge0.")
             return create_error_response("Submission token not received")
 
-        # Step 2: Poll for result
-        result_url = f"{BASE_URL}/submissions/{token}?base64_encoded=false&fields=stdout,stderr,compile_output,message,status,language_id,stdin,source_code,expected_output,cpu_time_limit,memory_limit,time,memory"
-        headers = {
-            "Content-Type": "application/json",
-            "X-RapidAPI-Host": JUDGE0_API_HOST,
-            "X-RapidAPI-Key": used_key
-        }
+        # Step 2: Poll for result with growing delays until the deadline. With callbacks the
+        # result is normally pushed while we wait, and polling only runs at a slow cadence
+        future = judge0_callback_service.expect(token) if _use_callback() else None
+        result_url = f"{endpoint.base_url}/submissions/{token}?base64_encoded=false&fields={RESULT_FIELDS}"
+        headers = endpoint.headers(used_key)
         timeout_config = httpx.Timeout(timeout=30.0, read=90.0) # Set read timeout to 90 seconds
 
-        async with httpx.AsyncClient(timeout=timeout_config) as client: # Used 30 second timeout to avoid hanging indefinitely
-            for attempt in range(10):  # Maximum of 10 attempts for retry
-                print("Polling for Judge0 result...")
-                result_response = await client.get(result_url, headers=headers)
-                result_response.raise_for_status()
-                result = result_response.json()
+        client = get_http_client("judge0")  # Pooled keep-alive client shared with submissions
+        attempt = 0
+        while True:
+            remaining = deadline_at - loop.time()
+            if remaining <= 0:
+                logger.warning("Judge0 timed out after polling.")
+                return create_error_response("Execution timed out. Judge0 did not respond in time.", deadline_exceeded=True)
+            if future is None:
+                await asyncio.sleep(min(poll_delay(attempt), remaining))
+            else:
+                pushed = await judge0_callback_service.wait_for_callback(
+                    future, min(JUDGE0_CALLBACK_POLL_INTERVAL, remaining)
+                )
+                if pushed:
+                    logger.info("Judge0 result received through callback.")
+                    return validate_and_clean_judge0_response(pushed)
+            attempt += 1
+
+            # Polling is idempotent: network errors and 5xx replies are retried
+            result_response = await retry_async(send_checked, client.get, result_url, headers=headers, timeout=timeout_config)
+            result = result_response.json()
+
+            status_id = result.get("status", {}).get("id", 0)
+            if status_id in [1, 2]:  # 1 = In Queue, 2 = Processing
+                logger.info(f"Waiting for Judge0 result... (Attempt {attempt})")
+                continue
+            if status_id == 3:
+                logger.info("Judge0 execution completed successfully.")
+            break
+        print(f"Judge0 result: {result}")    
+        print("calling validate_and_clean_judge0_response")
+        return validate_and_clean_judge0_response(result)
+
+    except CircuitOpenError as e:
+        # Judge0 deployment is known to be down: fail in milliseconds, the router tries another one
+        logger.warning(str(e))
+        return create_error_response(str(e), retryable=True)
+    except Exception as e:
+        logger.critical(f"Unexpected error in judge0_evaluate_code: {e}", exc_info=True)
+        return create_error_response(f"Unexpected error: {str(e)}", retryable=is_upstream_failure(e))
+    finally:
+        if token and _use_callback():
+            judge0_callback_service.discard(token)
+
+
+judge0_router = Judge0Router(
+    endpoints_from_env(BASE_URL, JUDGE0_API_HOST, JUDGE0_MAX_CONCURRENCY, JUDGE0_HOST_CONCURRENCY)
+)
+register_provider("judge0_router", judge0_router.snapshot)
+
+async def evaluate_code_concurrently(code: str, language_id: int, stdins: List[str], deadline: Optional[float] = None,
+                                     limits: Optional[dict] = None, endpoint: Optional[Judge0Endpoint] = None) -> List[dict]:
+    """
+    Run judge0_evaluate_code for every input at the same time, bounded by the host semaphore.
+    Results keep the order of stdins regardless of completion order.
+    """
+    endpoint = endpoint or judge0_router.endpoints[0]
+    # Process-wide bound on concurrent submissions to this deployment
+    semaphore = endpoint.semaphore
+
+    async def run_one(stdin: str) -> dict:
+        async with semaphore:
+            return await judge0_evaluate_code(code=code, language_id=language_id, stdin=stdin, deadline=deadline,
+                                              limits=limits, endpoint=endpoint)
+
+    return list(await asyncio.gather(*(run_one(stdin) for stdin in stdins)))
+
+async def judge0_evaluate_code_batch(code: str, language_id: int, stdins: List[str], deadline: Optional[float] = None,
+                                     limits: Optional[dict] = None, endpoint: Optional[Judge0Endpoint] = None) -> List[dict]:
+    """
+    Evaluate one program against several inputs with Judge0 batch submissions:
+    one POST for all test cases and one batched GET per polling round.
+    Results are returned in the same order as stdins.
+    """
+    if not stdins:
+        return []
+    endpoint = endpoint or judge0_router.endpoints[0]
+    # Batch submissions cannot use wait=true, in wait mode every run is its own synchronous request
+    if not JUDGE0_USE_BATCH or JUDGE0_WAIT_MODE:
+        return await evaluate_code_concurrently(code, language_id, stdins, deadline, limits, endpoint)
+    payloads = [
+        {"language_id": language_id, "source_code": code, "stdin": stdin, **_limit_fields(limits)}
+        for stdin in stdins
+    ]
+    if _use_callback():
+        for payload in payloads:
+            payload["callback_url"] = judge0_callback_service.callback_url(JUDGE0_CALLBACK_URL)
+    logger.info(f"Submitting batch of {len(payloads)} runs to Judge0 (language_id={language_id})")
+
+    pending = {}
+    futures = {}
+    try:
+        loop = asyncio.get_running_loop()
+        deadline_at = loop.time() + (deadline or JUDGE0_POLL_DEADLINE)
+        try:
+            submit_result = await rotate_judge0_batch_keys(
+                payloads, endpoint.host, base_url=endpoint.base_url,
+                key_pool=endpoint.key_pool, auth_header=endpoint.auth_header
+            )
+        except Exception as e:
+            # Some Judge0 plans/deployments disable batch submissions, fall back to concurrent single runs
+            logger.warning(f"Judge0 batch submission failed, running test cases individually: {e}")
+            return await evaluate_code_concurrently(code, language_id, stdins, deadline, limits, endpoint)
+        used_key = submit_result.get("used_key")
+        entries = submit_result.get("submissions") or []
 
+        # Entries without a token were rejected by Judge0 (validation errors), report them individually
+        results: List[dict] = [None] * len(payloads)
+        for idx in range(len(payloads)):
+            entry = entries[idx] if idx < len(entries) and isinstance(entries[idx], dict) else {}
+            token = entry.get("token")
+            if token:
+                pending[token] = idx
+            else:
+                logger.error(f"Judge0 rejected batch entry {idx}: {entry}")
+                results[idx] = create_error_response(f"Submission rejected by Judge0: {entry}")
+
+        # Pushed results are collected while waiting between the (then slow) polling rounds
+        if _use_callback():
+            futures = {token: judge0_callback_service.expect(token) for token in pending}
+
+        headers = endpoint.headers(used_key)
+        timeout_config = httpx.Timeout(timeout=30.0, read=90.0)
+
+        client = get_http_client("judge0")
+        attempt = 0
+        # Same adaptive schedule and deadline as judge0_evaluate_code, shared by the whole batch
+        while pending and loop.time() < deadline_at:
+            remaining = max(0.0, deadline_at - loop.time())
+            if not futures:
+                await asyncio.sleep(min(poll_delay(attempt), remaining))
+            else:
+                waiting = [futures[token] for token in pending]
+                await asyncio.wait(waiting, timeout=min(JUDGE0_CALLBACK_POLL_INTERVAL, remaining))
+                for token in [token for token in pending if futures[token].done() and not futures[token].cancelled()]:
+                    results[pending.pop(token)] = validate_and_clean_judge0_response(futures[token].result())
+                if not pending:
+                    break
+            attempt += 1
+            result_url = f"{endpoint.base_url}/submissions/batch?tokens={','.join(pending)}&base64_encoded=false&fields=token,{RESULT_FIELDS}"
+            # Polling is idempotent: network errors and 5xx replies are retried
+            result_response = await retry_async(send_checked, client.get, result_url, headers=headers, timeout=timeout_config)
+            for result in result_response.json().get("submissions") or []:
+                if not result:
+                    continue
                 status_id = result.get("status", {}).get("id", 0)
-                print(f"Judge0 status ID: {status_id}")
                 if status_id in [1, 2]:  # 1 = In Queue, 2 = Processing
-                    logger.info(f"Waiting for Judge0 result... (Attempt {attempt + 1})")
-                    print(f"Waiting for Judge0 result... (Attempt {attempt + 1})")
-                    await asyncio.sleep(1) # Wait 1 second before next attempt
-                elif status_id == 3:
-                    logger.info("Judge0 execution completed successfully.")
-                    break
-                else:
-                    break
-            else:
-                logger.warning("Judge0 timed out after polling.")
-                return create_error_response("Execution timed out. Judge0 did not respond in time.")
-            print(f"Judge0 result: {result}")    
-            print("calling validate_and_clean_judge0_response")
-            return validate_and_clean_judge0_response(result)
+                    continue
+                idx = pending.pop(result.get("token"), None)
+                if idx is not None:
+                    results[idx] = validate_and_clean_judge0_response(result)
+            if pending:
+                logger.info(f"Waiting for {len(pending)} Judge0 batch results... (Attempt {attempt})")
 
+        if pending:
+            logger.warning(f"Judge0 batch timed out with {len(pending)} runs still pending.")
+            for idx in pending.values():
+                results[idx] = create_error_response("Execution timed out. Judge0 did not respond in time.", deadline_exceeded=True)
+        return results
+
+    except CircuitOpenError as e:
+        logger.warning(str(e))
+        return [create_error_response(str(e), retryable=True) for _ in stdins]
     except Exception as e:
-        logger.critical(f"Unexpected error in evaluate_code: {e}", exc_info=True)
-        return create_error_response(f"Unexpected error: {str(e)}")
+        logger.critical(f"Unexpected error in judge0_evaluate_code_batch: {e}", exc_info=True)
+        return [create_error_response(f"Unexpected error: {str(e)}", retryable=is_upstream_failure(e)) for _ in stdins]
+    finally:
+        # Runs finished by polling included, nobody waits for their callbacks any more
+        for token in futures:
+            judge0_callback_service.discard(token)
+
+
+def _is_compile_error(result: dict) -> bool:
+    return result.get("status", {}).get("id") == STATUS_COMPILATION_ERROR["id"]
+
+def _compile_error_for(result: dict, stdin: str) -> dict:
+    # Same compilation error reported against another test case
+    return {**result, "status": dict(result["status"]), "stdin": stdin or ""}
+
+
+class Judge0Backend(ExecutionBackend):
+    """
+    Remote execution through Judge0 (RapidAPI or self-hosted).
+    Judge0 has no way to reuse a build between submissions, so for compiled languages the
+    backend avoids repeated work on failures: an optional compile probe on the first test case and a
+    cache of compilation errors by source hash for identical resubmissions.
+    """
+
+    name = "judge0"
+
+    def __init__(self):
+        self._compile_failures = CompileFailureCache()
+
+    async def run(self, code: str, language_id: int, stdin: str,
+                  limits: Optional[dict] = None, deadline: Optional[float] = None,
+                  expected_output: Optional[str] = None) -> dict:
+        return (await self.run_batch(code, language_id, [stdin], limits=limits, deadline=deadline))[0]
+
+    async def run_batch(self, code: str, language_id: int, stdins: List[str],
+                        limits: Optional[dict] = None, deadline: Optional[float] = None,
+                        expected_outputs: Optional[List[str]] = None) -> List[dict]:
+        # Judge0 only returns finished runs, expected outputs cannot stop a program early there
+        if not is_compiled_language(language_id):
+            return await self._routed(code, language_id, stdins, deadline, limits)
+
+        known_failure = self._compile_failures.get(code, language_id)
+        if known_failure is not None:
+            logger.info("Submission is identical to one that failed to compile, skipping Judge0")
+            return [_compile_error_for(known_failure, stdin) for stdin in stdins]
+
+        if JUDGE0_COMPILE_PROBE and len(stdins) > 1:
+            first = (await self._routed(code, language_id, stdins[:1], deadline, limits))[0]
+            if _is_compile_error(first):
+                self._compile_failures.put(code, language_id, first)
+                return [first] + [_compile_error_for(first, stdin) for stdin in stdins[1:]]
+            results = [first] + await self._routed(code, language_id, stdins[1:], deadline, limits)
+        else:
+            results = await self._routed(code, language_id, stdins, deadline, limits)
+
+        failure = next((r for r in results if _is_compile_error(r)), None)
+        if failure is not None:
+            self._compile_failures.put(code, language_id, failure)
+        return results
+
+    @staticmethod
+    async def _routed(code: str, language_id: int, stdins: List[str], deadline: Optional[float],
+                      limits: Optional[dict]) -> List[dict]:
+        # Runs that came back with an infrastructure error (transport errors, 5xx, 429, exhausted keys,
+        # open circuit) are retried on the next Judge0 endpoint within the same deadline. Requests
+        # Judge0 rejected (422, unsupported language) would fail everywhere and are returned as they
+        # are. Verdicts such as TLE or WA are final, and so are runs still unfinished at the deadline:
+        # the program may simply be that slow, and resubmitting it elsewhere would only run it twice
+        return await judge0_router.run(
+            stdins,
+            lambda endpoint, items, seconds_left: judge0_evaluate_code_batch(
+                code, language_id, items, deadline=seconds_left, limits=limits, endpoint=endpoint
+            ),
+            failed=lambda result: bool(result.get("retryable")),
+            deadline=deadline or JUDGE0_POLL_DEADLINE
+        )
+
+
+_judge0_backend = Judge0Backend()
+_local_backend = LocalSubprocessBackend()
+
+register_provider("local_execution", _local_backend.snapshot)
+
+async def start_execution_backends() -> None:
+    # Warm the local runner's fork servers at startup when it may be used
+    if EXECUTION_BACKEND in ("local", "auto"):
+        await _local_backend.start()
+    if EXECUTION_BACKEND != "local":
+        judge0_router.start()
+
+async def close_execution_backends() -> None:
+    await judge0_router.close()
+    await _local_backend.close()
+    _execution_cache.close()
+
+def get_execution_backend(language_id: int) -> ExecutionBackend:
+    """Pick the backend for a language according to EXECUTION_BACKEND."""
+    if EXECUTION_BACKEND in ("local", "auto") and _local_backend.supports(language_id):
+        return _local_backend
+    if EXECUTION_BACKEND == "local":
+        logger.warning(f"Local runner does not support language_id={language_id}, using Judge0")
+    return _judge0_backend
+
+_execution_cache = TieredCache(
+    "execution", EXECUTION_CACHE_SIZE, EXECUTION_CACHE_TTL_SECONDS, db_path=EXECUTION_CACHE_DB_PATH
+)
+
+def normalize_source(code: str) -> str:
+    # Line endings and trailing blank space at the end of the file never change what a program does
+    return (code or "").replace("\r\n", "\n").rstrip()
+
+def execution_cache_key(code: str, language_id: int, stdin: str, limits: Optional[dict] = None,
+                        expected_output: Optional[str] = None) -> str:
+    # The expected output is part of the key: a run stopped at the first wrong byte depends on it
+    return cache_key(language_id, normalize_source(code), stdin or "", limits or {}, expected_output)
+
+def _copy_result(result: dict) -> dict:
+    return {**result, "status": dict(result.get("status") or {})}
+
+async def evaluate_code(code: str, language_id: int, stdin: str,
+                        limits: Optional[dict] = None, deadline: Optional[float] = None,
+                        expected_output: Optional[str] = None) -> dict:
+    """
+    Run code against stdin on the configured execution backend and return the
+    cleaned result (same shape as validate_and_clean_judge0_response).
+    With expected_output the local runner stops the program at the first diverging byte.
+    """
+    return (await evaluate_code_batch(
+        code, language_id, [stdin], limits=limits, deadline=deadline, expected_outputs=[expected_output]
+    ))[0]
+
+async def evaluate_code_batch(code: str, language_id: int, stdins: List[str],
+                              limits: Optional[dict] = None, deadline: Optional[float] = None,
+                              expected_outputs: Optional[List[str]] = None) -> List[dict]:
+    """Run code against every input, results in the order of stdins. Cached results are reused."""
+    if not stdins:
+        return []
+    backend = get_execution_backend(language_id)
+    expected_outputs = expected_outputs or [None] * len(stdins)
+    if not EXECUTION_CACHE_ENABLED:
+        return await backend.run_batch(
+            code, language_id, stdins, limits=limits, deadline=deadline, expected_outputs=expected_outputs
+        )
+
+    keys = [
+        execution_cache_key(code, language_id, stdin, limits, expected)
+        for stdin, expected in zip(stdins, expected_outputs)
+    ]
+    results: List[Optional[dict]] = [await _execution_cache.get(key) for key in keys]
+    missing = [i for i, result in enumerate(results) if result is None]
+    if missing:
+        fresh = await backend.run_batch(
+            code, language_id, [stdins[i] for i in missing], limits=limits, deadline=deadline,
+            expected_outputs=[expected_outputs[i] for i in missing]
+        )
+        for i, result in zip(missing, fresh):
+            results[i] = result
+            if result.get("status", {}).get("id") in CACHEABLE_STATUS_IDS:
+                await _execution_cache.put(keys[i], _copy_result(result))
+    else:
+        logger.info(f"All {len(stdins)} test cases served from the execution cache")
+    # Callers may modify results, never hand out the cached objects themselves
+    return [_copy_result(result) for result in results]
 
 
 def validate_and_clean_judge0_response(response: dict) -> dict:
@@ -82,11 +466,14 @@ def validate_and_clean_judge0_response(response: dict) -> dict:
     """
     try:
         print(f"now i am in validate_and_clean_judge0_response")
+        # Judge0 output is unbounded, cap it before it travels any further
         cleaned_response = {
-            "stdout": response.get("stdout") or "",
-            "stderr": response.get("stderr") or "",
-            "compile_output": response.get("compile_output") or "",
-            "message": response.get("message") or "",
+            "stdout": truncate_output(response.get("stdout"), MAX_RESULT_OUTPUT_CHARS),
+            # Taken before truncation, so answers longer than the kept stdout can still be judged
+            "stdout_sha256": stdout_digest(response.get("stdout")),
+            "stderr": truncate_output(response.get("stderr"), MAX_RESULT_OUTPUT_CHARS),
+            "compile_output": truncate_output(response.get("compile_output"), MAX_RESULT_OUTPUT_CHARS),
+            "message": truncate_output(response.get("message"), MAX_RESULT_OUTPUT_CHARS),
             "status": {
                 "id": response.get("status", {}).get("id", 0),
                 "description": response.get("status", {}).get("description", "Unknown")
@@ -109,11 +496,14 @@ def validate_and_clean_judge0_response(response: dict) -> dict:
         return create_error_response("Error cleaning execution result")
 
 
-def create_error_response(error_message: str) -> dict:
+def create_error_response(error_message: str, deadline_exceeded: bool = False, retryable: bool = False) -> dict:
     """
     Generate standardized error response in case of failure.
+    deadline_exceeded marks runs that were still unfinished when we stopped waiting;
+    retryable marks infrastructure failures (transport errors, 5xx, 429, open circuit) that
+    another Judge0 endpoint may not have, as opposed to requests Judge0 rejected.
     """
-    return {
+    response = {
         "stdout": "",
         "stderr": error_message,
         "compile_output": "",
@@ -126,3 +516,8 @@ def create_error_response(error_message: str) -> dict:
         "memory": 0,
         "error": True
     }
+    if deadline_exceeded:
+        response["deadline_exceeded"] = True
+    if retryable:
+        response["retryable"] = True
+    return response
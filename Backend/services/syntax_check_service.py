@@ -0,0 +1,103 @@
+# services/syntax_check_service.py
+#
+# Cheap pre-check that runs before any remote execution: a submission that does not even
+# parse is rejected with local diagnostics, without Judge0 runs or a Gemini call.
+# Checkers are registered per Judge0 language id; languages without one skip the check.
+
+import asyncio
+import os
+import shutil
+import sys
+import tempfile
+import traceback
+from typing import Awaitable, Callable, Dict, Optional
+from dotenv import load_dotenv
+from logging_config import logger
+from services import sandbox
+
+load_dotenv()
+
+# Also pre-check C and C++ with the local compiler (gcc/g++ -fsyntax-only) when installed.
+# Off by default: compiler diagnostics may quote files from this host (#include "/etc/...").
+SYNTAX_CHECK_COMPILERS = os.getenv("SYNTAX_CHECK_COMPILERS", "false").lower() == "true"
+SYNTAX_CHECK_TIMEOUT = float(os.getenv("SYNTAX_CHECK_TIMEOUT", "5"))
+SYNTAX_CHECK_MAX_OUTPUT_CHARS = 4000
+
+# A checker returns None when the code parses, otherwise the diagnostics to show the candidate
+SyntaxChecker = Callable[[str], Awaitable[Optional[str]]]
+
+_checkers: Dict[int, SyntaxChecker] = {}
+
+
+def register_checker(language_id: int, checker: SyntaxChecker) -> None:
+    _checkers[language_id] = checker
+
+
+async def check_syntax(code: str, language_id: int) -> Optional[str]:
+    """Diagnostics when the code certainly does not compile, None when it does or nobody can tell."""
+    checker = _checkers.get(language_id)
+    if checker is None:
+        return None
+    try:
+        return await checker(code)
+    except Exception as e:
+        # A broken checker must never reject a submission
+        logger.error(f"Syntax checker for language_id={language_id} failed: {e}", exc_info=True)
+        return None
+
+
+async def check_python_syntax(code: str) -> Optional[str]:
+    # compile() only parses and generates bytecode, nothing from the submission is executed.
+    # The pseudo file name keeps the traceback module from quoting a file on this host.
+    try:
+        compile(code, "<submission>", "exec", dont_inherit=True)
+    except (SyntaxError, ValueError) as e:
+        return "".join(traceback.format_exception_only(type(e), e)).strip()
+    except (RecursionError, MemoryError):
+        # Too deeply nested for this interpreter; let the real runner decide
+        return None
+    return None
+
+
+def compiler_syntax_checker(compiler: str, source_name: str, flags: list) -> SyntaxChecker:
+    """Checker running `<compiler> -fsyntax-only` inside the sandbox (no network, rlimits, timeout)."""
+
+    async def check(code: str) -> Optional[str]:
+        executable = shutil.which(compiler)
+        if executable is None:
+            return None
+        with tempfile.TemporaryDirectory(prefix="syntax-") as workdir:
+            with open(os.path.join(workdir, source_name), "w", encoding="utf-8") as f:
+                f.write(code)
+            proc = await asyncio.create_subprocess_exec(
+                sys.executable, "-I", "-S", sandbox.SCRIPT_PATH, "--exec",
+                str(SYNTAX_CHECK_TIMEOUT), "0", str(1024 * 1024),
+                executable, "-fsyntax-only", *flags, source_name,
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.STDOUT,
+                cwd=workdir,
+                env=sandbox.SANDBOX_ENV,
+                start_new_session=True
+            )
+            try:
+                output, _ = await asyncio.wait_for(proc.communicate(), timeout=SYNTAX_CHECK_TIMEOUT)
+            except asyncio.TimeoutError:
+                try:
+                    os.killpg(proc.pid, 9)
+                except ProcessLookupError:
+                    pass
+                await proc.wait()
+                return None
+        if proc.returncode == 0 or proc.returncode < 0:
+            # Clean, or killed by a limit: no verdict either way
+            return None
+        return output.decode("utf-8", errors="replace")[:SYNTAX_CHECK_MAX_OUTPUT_CHARS].strip()
+
+    return check
+
+
+register_checker(71, check_python_syntax)
+if SYNTAX_CHECK_COMPILERS:
+    register_checker(50, compiler_syntax_checker("gcc", "main.c", ["-std=gnu11"]))
+    register_checker(54, compiler_syntax_checker("g++", "main.cpp", ["-std=gnu++17"]))
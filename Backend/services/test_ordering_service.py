@@ -0,0 +1,50 @@
+# services/test_ordering_service.py
+#
+# Failure history per question and per candidate, used to run the test cases most likely
+# to fail first. Combined with fail-fast evaluation a broken submission is usually
+# rejected after a single execution. History lives in process memory.
+
+import os
+from collections import Counter, OrderedDict
+from typing import Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Number of (candidate, question) pairs whose last failures are remembered
+CANDIDATE_HISTORY_SIZE = int(os.getenv("CANDIDATE_HISTORY_SIZE", "10000"))
+
+# question_id -> example index -> number of failing runs
+_question_failures: Dict[int, Counter] = {}
+# (candidate_id, question_id) -> example indices that failed on the candidate's last attempt
+_candidate_failures: "OrderedDict[Tuple[str, int], List[int]]" = OrderedDict()
+
+
+def order_test_cases(question_id: int, count: int, candidate_id: Optional[str] = None) -> List[int]:
+    """
+    Example indices in the order they should run: tests this candidate failed last time,
+    then tests by how often they fail for this question, then the original CSV order.
+    """
+    previous = set(_candidate_failures.get((candidate_id, question_id), [])) if candidate_id else set()
+    failures = _question_failures.get(question_id, Counter())
+    return sorted(range(count), key=lambda i: (i not in previous, -failures[i], i))
+
+
+def record_results(question_id: int, outcomes: Dict[int, bool], candidate_id: Optional[str] = None) -> None:
+    """Remember which executed test cases failed; outcomes maps example index -> passed."""
+    failed = [i for i, passed in outcomes.items() if not passed]
+    if failed:
+        _question_failures.setdefault(question_id, Counter()).update(failed)
+    if candidate_id:
+        key = (candidate_id, question_id)
+        _candidate_failures[key] = failed
+        _candidate_failures.move_to_end(key)
+        while len(_candidate_failures) > CANDIDATE_HISTORY_SIZE:
+            _candidate_failures.popitem(last=False)
+
+
+def snapshot() -> dict:
+    return {
+        "questions_tracked": len(_question_failures),
+        "candidates_tracked": len(_candidate_failures)
+    }
@@ -0,0 +1,45 @@
+import asyncio
+import uuid
+
+import pytest
+
+from services import local_execution_service, sandbox
+from services.local_execution_service import LocalSubprocessBackend, PYTHON_LANGUAGE_ID
+
+pytestmark = pytest.mark.skipif(not sandbox.isolation_available(), reason="sandbox isolation is unavailable")
+
+# Looks for the answer key in every frame above the submission and every object on the heap
+READ_ANSWER_KEY = """
+import gc, sys
+frame, found = sys._getframe(), None
+while frame is not None and found is None:
+    for value in list(frame.f_locals.values()):
+        if isinstance(value, dict) and "expected_output" in value:
+            found = value["expected_output"]
+    frame = frame.f_back
+for obj in gc.get_objects():
+    if found is None and isinstance(obj, dict) and isinstance(obj.get("expected_output"), str):
+        found = obj["expected_output"]
+print(found)
+"""
+
+
+async def _run_batch(warm_pool_size: int, stdins: list, expected_outputs: list) -> list:
+    backend = LocalSubprocessBackend(warm_pool_size=warm_pool_size)
+    await backend.start()
+    try:
+        return await backend.run_batch(READ_ANSWER_KEY, PYTHON_LANGUAGE_ID, stdins, expected_outputs=expected_outputs)
+    finally:
+        await backend.close()
+
+
+@pytest.mark.parametrize("warm_pool_size", [0, 1])
+@pytest.mark.parametrize("harness_mode", ["false", "true"])
+def test_submission_cannot_read_expected_output(monkeypatch, warm_pool_size, harness_mode):
+    monkeypatch.setattr(local_execution_service, "LOCAL_HARNESS_MODE", harness_mode)
+    secret = uuid.uuid4().hex
+    results = asyncio.run(_run_batch(warm_pool_size, ["", ""], [secret, secret]))
+    assert len(results) == 2
+    for result in results:
+        assert secret not in result["stdout"]
+        assert result["status"]["description"] != "Accepted"
@@ -0,0 +1,177 @@
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+from logging_config import logger
+from utils.metrics import increment, register_provider
+
+
+def cache_key(*parts: Any) -> str:
+    """Stable sha256 key for JSON-serialisable parts."""
+    body = json.dumps(parts, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(body.encode("utf-8")).hexdigest()
+
+
+class LRUTTLCache:
+    """In-memory cache bounded by entry count (least recently used go first) and entry age."""
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: str, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteCacheTier:
+    """
+    On-disk cache tier: JSON values in a single SQLite table, expired rows are purged lazily.
+    Values are data only, a row written by someone else can never run code in this process.
+    """
+
+    def __init__(self, path: str, ttl_seconds: float):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        # The database must belong to this user and be writable by nobody else
+        for target in (directory, path):
+            if os.path.exists(target):
+                info = os.stat(target)
+                if info.st_uid != os.getuid() or info.st_mode & 0o022:
+                    raise PermissionError(f"{target} is writable by other users")
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        os.chmod(path, 0o600)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, expires_at REAL NOT NULL, value BLOB NOT NULL)"
+        )
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            row = self._conn.execute("SELECT expires_at, value FROM cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if row[0] < time.time():
+                self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                return None
+            try:
+                return json.loads(row[1])
+            except (TypeError, ValueError):
+                # Not ours (or from an older format): drop it and treat it as a miss
+                self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                return None
+
+    def put(self, key: str, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        body = json.dumps(value, separators=(",", ":"))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, expires_at, value) VALUES (?, ?, ?)",
+                (key, time.time() + ttl, body)
+            )
+
+    def purge_expired(self) -> int:
+        with self._lock:
+            return self._conn.execute("DELETE FROM cache WHERE expires_at < ?", (time.time(),)).rowcount
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class TieredCache:
+    """
+    Memory LRU+TTL cache with an optional SQLite tier behind it.
+    Memory hits never leave the event loop; disk lookups run in a worker thread and
+    are promoted to memory. Hits and misses are counted as <name>_cache_* metrics.
+    """
+
+    def __init__(self, name: str, max_entries: int, ttl_seconds: float, db_path: Optional[str] = None):
+        self.name = name
+        self.memory = LRUTTLCache(max_entries, ttl_seconds)
+        self.disk: Optional[SQLiteCacheTier] = None
+        if db_path:
+            try:
+                self.disk = SQLiteCacheTier(db_path, ttl_seconds)
+            except (sqlite3.Error, OSError) as e:
+                logger.error(f"Cache '{name}': on-disk tier at {db_path} unavailable, using memory only: {e}")
+        register_provider(f"{name}_cache", self.snapshot)
+
+    def get_memory(self, key: str) -> Optional[Any]:
+        """Memory tier only; synchronous so hot paths can skip the await."""
+        value = self.memory.get(key)
+        if value is not None:
+            increment(f"{self.name}_cache_hits")
+        return value
+
+    async def get(self, key: str) -> Optional[Any]:
+        value = self.get_memory(key)
+        if value is not None:
+            return value
+        if self.disk is not None:
+            try:
+                value = await asyncio.to_thread(self.disk.get, key)
+            except Exception as e:
+                logger.error(f"Cache '{self.name}': disk lookup failed: {e}")
+                value = None
+            if value is not None:
+                increment(f"{self.name}_cache_hits")
+                increment(f"{self.name}_cache_disk_hits")
+                self.memory.put(key, value)
+                return value
+        increment(f"{self.name}_cache_misses")
+        return None
+
+    async def put(self, key: str, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        self.memory.put(key, value, ttl_seconds)
+        if self.disk is not None:
+            try:
+                await asyncio.to_thread(self.disk.put, key, value, ttl_seconds)
+            except Exception as e:
+                logger.error(f"Cache '{self.name}': disk write failed: {e}")
+
+    def snapshot(self) -> dict:
+        return {
+            "entries": len(self.memory),
+            "max_entries": self.memory.max_entries,
+            "ttl_seconds": self.memory.ttl_seconds,
+            "disk": self.disk.path if self.disk is not None else None
+        }
+
+    def clear(self) -> None:
+        self.memory.clear()
+
+    def close(self) -> None:
+        if self.disk is not None:
+            self.disk.close()
+            self.disk = None
@@ -0,0 +1,175 @@
+import json
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Callable, Dict
+from dotenv import load_dotenv
+from logging_config import logger
+from utils.metrics import increment, register_provider
+
+load_dotenv()
+
+# Defaults for every upstream breaker; CIRCUIT_BREAKER_OVERRIDES tunes single upstreams, e.g.
+# {"gemini": {"open_seconds": 60}, "judge0:http://judge0:2358": {"error_rate_threshold": 0.8}}
+CIRCUIT_ERROR_RATE_THRESHOLD = float(os.getenv("CIRCUIT_ERROR_RATE_THRESHOLD", "0.5"))
+# Calls needed in the window before the error rate can open the breaker
+CIRCUIT_MIN_CALLS = int(os.getenv("CIRCUIT_MIN_CALLS", "5"))
+CIRCUIT_WINDOW_SECONDS = float(os.getenv("CIRCUIT_WINDOW_SECONDS", "60"))
+# How long an open breaker rejects calls before letting probes through
+CIRCUIT_OPEN_SECONDS = float(os.getenv("CIRCUIT_OPEN_SECONDS", "30"))
+# Concurrent probe calls allowed while half-open; all must succeed to close again
+CIRCUIT_HALF_OPEN_PROBES = int(os.getenv("CIRCUIT_HALF_OPEN_PROBES", "1"))
+CIRCUIT_BREAKER_OVERRIDES: Dict[str, dict] = json.loads(os.getenv("CIRCUIT_BREAKER_OVERRIDES", "{}"))
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream whose breaker is open."""
+
+    def __init__(self, name: str, retry_in: float):
+        super().__init__(f"Circuit for {name} is open, retry in {retry_in:.0f}s")
+        self.name = name
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    """
+    Closed: calls pass and outcomes are counted over a sliding window; once the error rate
+    reaches the threshold the breaker opens. Open: calls fail immediately with CircuitOpenError.
+    Half-open (after open_seconds): a few probe calls pass; success closes the breaker, a
+    failure opens it again.
+    """
+
+    def __init__(self, name: str, error_rate_threshold: float = CIRCUIT_ERROR_RATE_THRESHOLD,
+                 min_calls: int = CIRCUIT_MIN_CALLS, window_seconds: float = CIRCUIT_WINDOW_SECONDS,
+                 open_seconds: float = CIRCUIT_OPEN_SECONDS, half_open_probes: int = CIRCUIT_HALF_OPEN_PROBES):
+        self.name = name
+        self.error_rate_threshold = error_rate_threshold
+        self.min_calls = max(1, min_calls)
+        self.window_seconds = window_seconds
+        self.open_seconds = open_seconds
+        self.half_open_probes = max(1, half_open_probes)
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.probes_in_flight = 0
+        self.probe_successes = 0
+        # (timestamp, ok) of calls made while closed
+        self.outcomes = deque()
+
+    def _prune(self, now: float) -> None:
+        while self.outcomes and now - self.outcomes[0][0] > self.window_seconds:
+            self.outcomes.popleft()
+
+    def error_rate(self) -> float:
+        self._prune(time.monotonic())
+        if not self.outcomes:
+            return 0.0
+        return sum(1 for _, ok in self.outcomes if not ok) / len(self.outcomes)
+
+    def current_state(self) -> str:
+        if self.state == OPEN and time.monotonic() - self.opened_at >= self.open_seconds:
+            self._transition(HALF_OPEN)
+        return self.state
+
+    def is_open(self) -> bool:
+        """True while calls would be rejected outright."""
+        state = self.current_state()
+        return state == OPEN or (state == HALF_OPEN and self.probes_in_flight >= self.half_open_probes)
+
+    def _transition(self, state: str) -> None:
+        if state == self.state:
+            return
+        logger.warning(f"Circuit for {self.name}: {self.state} -> {state}")
+        increment(f"circuit_{state}")
+        self.state = state
+        self.probes_in_flight = 0
+        self.probe_successes = 0
+        if state == OPEN:
+            self.opened_at = time.monotonic()
+        if state == CLOSED:
+            self.outcomes.clear()
+
+    def before_call(self) -> bool:
+        """Admit a call or raise CircuitOpenError. Returns True when the call is a half-open probe."""
+        state = self.current_state()
+        if state == CLOSED:
+            return False
+        if state == HALF_OPEN and self.probes_in_flight < self.half_open_probes:
+            self.probes_in_flight += 1
+            return True
+        increment("circuit_rejections")
+        retry_in = max(0.0, self.opened_at + self.open_seconds - time.monotonic())
+        raise CircuitOpenError(self.name, retry_in)
+
+    def record(self, ok: bool, probe: bool = False) -> None:
+        if probe:
+            if self.state != HALF_OPEN:
+                return
+            self.probes_in_flight -= 1
+            if not ok:
+                self._transition(OPEN)
+                return
+            self.probe_successes += 1
+            if self.probe_successes >= self.half_open_probes:
+                self._transition(CLOSED)
+            return
+        if self.state != CLOSED:
+            # A call admitted before the breaker opened; its outcome changes nothing now
+            return
+        now = time.monotonic()
+        self.outcomes.append((now, ok))
+        self._prune(now)
+        if len(self.outcomes) >= self.min_calls and self.error_rate() >= self.error_rate_threshold:
+            self._transition(OPEN)
+
+    @asynccontextmanager
+    async def guard(self, is_failure: Callable[[BaseException], bool] = lambda e: True):
+        """
+        Wrap one upstream call. Exceptions for which is_failure is False (bad input, ...) pass
+        through without counting against the upstream.
+        """
+        probe = self.before_call()
+        try:
+            yield
+        except Exception as e:
+            self.record(not is_failure(e), probe)
+            raise
+        except BaseException:
+            # Cancelled: no verdict on the upstream, just give the probe slot back
+            if probe and self.state == HALF_OPEN:
+                self.probes_in_flight -= 1
+            raise
+        else:
+            self.record(True, probe)
+
+    def snapshot(self) -> dict:
+        self._prune(time.monotonic())
+        state = self.current_state()
+        return {
+            "state": state,
+            "error_rate": round(self.error_rate(), 3),
+            "calls_in_window": len(self.outcomes),
+            "retry_in": round(max(0.0, self.opened_at + self.open_seconds - time.monotonic()), 1) if state == OPEN else 0.0
+        }
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    """Process-wide breaker for one upstream, created on first use."""
+    breaker = _breakers.get(name)
+    if breaker is None:
+        breaker = _breakers[name] = CircuitBreaker(name, **CIRCUIT_BREAKER_OVERRIDES.get(name, {}))
+    return breaker
+
+
+def breakers_snapshot() -> dict:
+    return {name: breaker.snapshot() for name, breaker in _breakers.items()}
+
+
+register_provider("circuit_breakers", breakers_snapshot)
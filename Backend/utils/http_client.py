@@ -0,0 +1,61 @@
+import os
+import httpx
+from typing import Dict
+from logging_config import logger
+
+# Connection pool tuning for the shared outbound clients
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "60"))
+# HTTP/2 multiplexes requests over one connection; needs the optional `h2` package (pip install httpx[http2])
+HTTP2_ENABLED = os.getenv("HTTP2_ENABLED", "false").lower() == "true"
+
+# Default timeout; individual calls still pass their own where they need a different one
+DEFAULT_TIMEOUT = httpx.Timeout(timeout=30.0, read=90.0)
+
+_clients: Dict[str, httpx.AsyncClient] = {}
+
+def _http2_available() -> bool:
+    if not HTTP2_ENABLED:
+        return False
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        logger.warning("HTTP2_ENABLED is set but the 'h2' package is not installed, using HTTP/1.1")
+        return False
+
+def _create_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        timeout=DEFAULT_TIMEOUT,
+        limits=httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY
+        ),
+        http2=_http2_available()
+    )
+
+def get_http_client(name: str = "default") -> httpx.AsyncClient:
+    """
+    Return the long-lived client registered under name. Clients are normally created in the
+    app lifespan; one is created on demand when called outside it (scripts, tests).
+    """
+    client = _clients.get(name)
+    if client is None or client.is_closed:
+        client = _clients[name] = _create_client()
+    return client
+
+async def init_http_clients(*names: str) -> None:
+    # Open the pooled clients up front so the first request does not pay for it
+    for name in names or ("default",):
+        get_http_client(name)
+
+async def close_http_clients() -> None:
+    # Called on app shutdown to close keep-alive connections cleanly
+    for name, client in list(_clients.items()):
+        try:
+            await client.aclose()
+        except Exception as e:
+            logger.error(f"Failed to close HTTP client '{name}': {e}")
+    _clients.clear()
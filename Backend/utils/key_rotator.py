@@ -1,8 +1,24 @@
 import os
 import ast
-import httpx
-from typing import List
+import time
 import asyncio
+import hashlib
+import signal
+import httpx
+from collections import deque
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from dotenv import dotenv_values, load_dotenv
+from utils.retry import retry_async, is_connect_error, is_transient_error
+from utils.circuit_breaker import CircuitBreaker, get_breaker
+from utils.http_client import get_http_client
+from utils.metrics import increment, register_provider
+from logging_config import logger
+
+# Key pools are built at import time, make sure .env has been applied first
+load_dotenv()
 
 def get_env_keys(key_name: str) -> List[str]:   
     # Get the environment variable with the given key name
@@ -10,87 +26,435 @@ def get_env_keys(key_name: str) -> List[str]:
     return ast.literal_eval(os.getenv(key_name, "[]"))
 
 
-async def rotate_judge0_keys(payload: dict, host: str) -> dict:
-    # Get the Judge0 API keys from the environment variables
-    keys = get_env_keys("JUDGE0_API_KEYS")
+# Default cooldown applied to a key after a 429 / quota error when the upstream gives no Retry-After
+KEY_COOLDOWN_SECONDS = float(os.getenv("KEY_COOLDOWN_SECONDS", "60"))
+# Sliding window used to compute each key's recent error rate
+KEY_HEALTH_WINDOW_SECONDS = float(os.getenv("KEY_HEALTH_WINDOW_SECONDS", "300"))
+# Keys whose recent error rate is above this are only used after the healthy ones
+KEY_MAX_ERROR_RATE = float(os.getenv("KEY_MAX_ERROR_RATE", "0.5"))
+# Seconds between re-reads of the key env vars (from .env when set there), so keys can be added
+# or retired without a restart; 0 disables it. SIGHUP triggers a re-read at any time
+KEY_RELOAD_INTERVAL_SECONDS = float(os.getenv("KEY_RELOAD_INTERVAL_SECONDS", "60"))
+
+
+class KeyState:
+    """Runtime health of one API key."""
+
+    def __init__(self, key: str):
+        self.key = key
+        self.in_flight = 0
+        self.last_used = 0.0
+        self.cooldown_until = 0.0
+        # (timestamp, outcome) with outcome in "ok", "error", "rate_limited"
+        self.outcomes = deque()
+
+    def _prune(self, now: float) -> None:
+        while self.outcomes and now - self.outcomes[0][0] > KEY_HEALTH_WINDOW_SECONDS:
+            self.outcomes.popleft()
+
+    def record(self, outcome: str) -> None:
+        now = time.monotonic()
+        self.outcomes.append((now, outcome))
+        self._prune(now)
+
+    def counts(self) -> Dict[str, int]:
+        self._prune(time.monotonic())
+        counts = {"ok": 0, "error": 0, "rate_limited": 0}
+        for _, outcome in self.outcomes:
+            counts[outcome] += 1
+        return counts
+
+    def error_rate(self) -> float:
+        counts = self.counts()
+        total = sum(counts.values())
+        return (counts["error"] + counts["rate_limited"]) / total if total else 0.0
+
+    def cooling_down(self) -> bool:
+        return time.monotonic() < self.cooldown_until
+
+
+# Client errors that mean this key was refused (invalid, unsubscribed, out of quota), not the request
+KEY_REJECTED_STATUS_CODES = {401, 403, 429}
+
+# Every pool, for reload_key_pools()
+_key_pools: List["KeyPool"] = []
+
+
+class KeyPool:
+    """
+    API keys for one upstream, parsed once from an env var (a Python list literal).
+    Tracks per-key in-flight requests, recent 429s and errors, honours cooldowns, and
+    hands out keys least-loaded first. Keys can be added, removed or reloaded at runtime.
+    """
+
+    def __init__(self, name: str, env_var: str):
+        self.name = name
+        self.env_var = env_var
+        self._states: Dict[str, KeyState] = {}
+        self.reload()
+        _key_pools.append(self)
+
+    def reload(self) -> None:
+        # Re-read the env var; existing keys keep their health state
+        try:
+            keys = get_env_keys(self.env_var)
+        except (ValueError, SyntaxError) as e:
+            logger.error(f"Invalid {self.env_var}, keeping current keys: {e}")
+            return
+        added = [key for key in keys if key and key not in self._states]
+        removed = [key for key in self._states if key not in keys]
+        for key in added:
+            self.add_key(key)
+        for key in removed:
+            self.remove_key(key)
+        if (added or removed) and self in _key_pools:
+            logger.info(f"{self.name} keys reloaded: {len(added)} added, {len(removed)} removed")
+
+    def add_key(self, key: str) -> None:
+        if key and key not in self._states:
+            self._states[key] = KeyState(key)
+
+    def remove_key(self, key: str) -> None:
+        # Requests already using the key finish normally, it is just never handed out again
+        self._states.pop(key, None)
+
+    def keys(self) -> List[str]:
+        return list(self._states)
+
+    def candidates(self) -> List[KeyState]:
+        """
+        Keys to try in order: not cooling down, low error rate first, then fewest in flight;
+        ties go to the least recently used key so quota is spread across the pool.
+        """
+        available = [state for state in self._states.values() if not state.cooling_down()]
+        return sorted(
+            available,
+            key=lambda state: (state.error_rate() > KEY_MAX_ERROR_RATE, state.in_flight, state.error_rate(), state.last_used)
+        )
+
+    @asynccontextmanager
+    async def use(self, state: KeyState):
+        state.in_flight += 1
+        state.last_used = time.monotonic()
+        try:
+            yield state.key
+        finally:
+            state.in_flight -= 1
+
+    def mark_success(self, state: KeyState) -> None:
+        state.record("ok")
+
+    def mark_error(self, state: KeyState) -> None:
+        state.record("error")
+
+    def mark_rate_limited(self, state: KeyState, retry_after: Optional[float] = None) -> None:
+        state.record("rate_limited")
+        cooldown = retry_after if retry_after is not None else KEY_COOLDOWN_SECONDS
+        state.cooldown_until = max(state.cooldown_until, time.monotonic() + cooldown)
+        logger.warning(f"{self.name} key ...{state.key[-4:]} rate limited, cooling down for {cooldown:.0f}s")
+
+    def snapshot(self) -> dict:
+        # Key values are masked, only the last 4 characters are exposed
+        now = time.monotonic()
+        return {
+            "keys": [
+                {
+                    "key": f"...{state.key[-4:]}",
+                    "in_flight": state.in_flight,
+                    "cooldown_remaining": round(max(0.0, state.cooldown_until - now), 1),
+                    "error_rate": round(state.error_rate(), 3),
+                    **state.counts()
+                }
+                for state in self._states.values()
+            ]
+        }
+
+
+def parse_retry_after(headers) -> Optional[float]:
+    """Seconds to wait from Retry-After (seconds or HTTP date) or RapidAPI quota reset headers."""
+    value = headers.get("Retry-After")
+    if value:
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            try:
+                return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+            except (TypeError, ValueError):
+                pass
+    # RapidAPI reports seconds until the plan quota resets
+    for header in ("X-RateLimit-Requests-Reset", "X-RateLimit-Reset"):
+        value = headers.get(header)
+        if value:
+            try:
+                return max(0.0, float(value))
+            except ValueError:
+                continue
+    return None
+
+
+class KeysExhaustedError(Exception):
+    """Every key of an upstream was rate limited, rejected or failed."""
+
+
+def is_upstream_failure(exc: BaseException) -> bool:
+    # What counts against an upstream's circuit breaker; bad requests (4xx) are the caller's fault
+    if isinstance(exc, KeysExhaustedError):
+        return True
+    if isinstance(exc, httpx.HTTPStatusError) and exc.response.status_code == 429:
+        return True
+    return is_transient_error(exc)
+
+
+def judge0_breaker(base_url: str) -> CircuitBreaker:
+    # One breaker per Judge0 deployment, so a dead self-hosted instance does not block RapidAPI
+    return get_breaker(f"judge0:{base_url}")
+
+
+gemini_breaker = get_breaker("gemini")
+
+def reload_key_pools() -> None:
+    """Re-read the env var of every key pool, taking the value from .env when it is set there."""
+    values = dotenv_values()
+    for pool in _key_pools:
+        value = values.get(pool.env_var)
+        if value is not None:
+            os.environ[pool.env_var] = value
+        pool.reload()
+
+
+async def _key_reload_loop() -> None:
+    while True:
+        await asyncio.sleep(KEY_RELOAD_INTERVAL_SECONDS)
+        try:
+            reload_key_pools()
+        except Exception as e:
+            logger.error(f"Reloading API keys failed: {e}")
+
+
+_key_reload_task: Optional[asyncio.Task] = None
+
+
+def start_key_reload() -> None:
+    """Re-read the keys periodically and on SIGHUP; call from the running event loop."""
+    global _key_reload_task
+    if KEY_RELOAD_INTERVAL_SECONDS > 0 and _key_reload_task is None:
+        _key_reload_task = asyncio.create_task(_key_reload_loop())
+    try:
+        asyncio.get_running_loop().add_signal_handler(signal.SIGHUP, reload_key_pools)
+    except (NotImplementedError, RuntimeError, AttributeError):
+        # No SIGHUP (Windows) or not in the main thread: the periodic re-read still applies
+        pass
+
+
+async def stop_key_reload() -> None:
+    global _key_reload_task
+    if _key_reload_task is not None:
+        _key_reload_task.cancel()
+        try:
+            await _key_reload_task
+        except asyncio.CancelledError:
+            pass
+        _key_reload_task = None
+
+
+judge0_key_pool = KeyPool("judge0", "JUDGE0_API_KEYS")
+gemini_key_pool = KeyPool("gemini", "GEMINI_API_KEYS")
+register_provider("judge0_keys", judge0_key_pool.snapshot)
+register_provider("gemini_keys", gemini_key_pool.snapshot)
+
+
+async def _post_judge0_with_rotation(path: str, body, host: str, query: str = "", timeout: float = 20.0,
+                                     base_url: Optional[str] = None, key_pool: Optional[KeyPool] = None,
+                                     auth_header: str = "X-RapidAPI-Key"):
+    # Each Judge0 deployment can have its own keys and auth header (RapidAPI key or X-Auth-Token)
+    key_pool = key_pool or judge0_key_pool
+    base_url = base_url or f"https://{host}"
+    # While the deployment's breaker is open this fails immediately instead of walking every key
+    async with judge0_breaker(base_url).guard(is_upstream_failure):
+        return await _post_judge0_keys(path, body, host, query, timeout, base_url, key_pool, auth_header)
+
+
+async def _post_judge0_keys(path: str, body, host: str, query: str, timeout: float, base_url: str,
+                            key_pool: KeyPool, auth_header: str):
     # Set the URL for the Judge0 API
-    url = f"https://{host}/submissions?base64_encoded=false"
+    url = f"{base_url}{path}?base64_encoded=false{query}"
     # Set the base headers for the request
-    headers_base = {
-        "Content-Type": "application/json",
-        "X-RapidAPI-Host": host
-    }
-
-    # Use an asynchronous HTTP client to make the request
-    async with httpx.AsyncClient(timeout=20.0) as client:
-        # Loop through each key
-        for key in keys:
+    headers_base = {"Content-Type": "application/json"}
+    if host:
+        headers_base["X-RapidAPI-Host"] = host
+
+    # Reuse the pooled Judge0 client so each submission skips the TCP/TLS handshake
+    client = get_http_client("judge0")
+
+    if not key_pool.keys():
+        # Self-hosted Judge0 (or a local stand-in) without authentication: a single keyless attempt
+        # A submission is not idempotent: only resend it when the first attempt never reached Judge0
+        res = await retry_async(client.post, url, headers=headers_base, json=body, timeout=timeout,
+                                retry_if=is_connect_error)
+        res.raise_for_status()
+        return res.json(), None
+
+    # Try the healthiest, least loaded keys first
+    for state in key_pool.candidates():
+        async with key_pool.use(state) as key:
             # Set the headers for the request with the current key
-            headers = {**headers_base, "X-RapidAPI-Key": key}
+            headers = {**headers_base, auth_header: key}
             try:
-                # Make the POST request with the current key
-                res = await client.post(url, headers=headers, json=payload)
-                # If the status code is 429, continue to the next key
+                # Make the POST request with the current key, retrying with backoff only when it never
+                # reached Judge0 (a resent submission would run, and be billed, twice)
+                res = await retry_async(client.post, url, headers=headers, json=body, timeout=timeout,
+                                        retry_if=is_connect_error)
+                # If the status code is 429, cool the key down and continue to the next one
                 if res.status_code == 429:  # Too Many Requests
+                    key_pool.mark_rate_limited(state, parse_retry_after(res.headers))
                     continue  # Try next key
                 # Raise an exception if the request was unsuccessful
                 res.raise_for_status()
-                # Get the token from the response
-                token = res.json().get("token")
-                # Return the token and the used key
-                return {"token": token, "used_key": key}
+                key_pool.mark_success(state)
+                # Return the decoded body and the used key
+                return res.json(), key
+            except httpx.HTTPStatusError as e:
+                if e.response.status_code not in KEY_REJECTED_STATUS_CODES and e.response.status_code < 500:
+                    # Judge0 rejected the request itself (422, unknown language): no key will do better
+                    key_pool.mark_success(state)
+                    raise
+                key_pool.mark_error(state)
+                continue
             except Exception as e:
                 # Continue to the next key if an exception is raised
+                key_pool.mark_error(state)
                 continue
 
     # Raise an exception if all keys have been exhausted or are invalid
-    raise Exception("All Judge0 keys exhausted or invalid.")
+    raise KeysExhaustedError("All Judge0 keys exhausted or invalid.")
 
 
-import asyncio
+async def rotate_judge0_keys(payload: dict, host: str, wait: bool = False, fields: str = "",
+                             base_url: Optional[str] = None, key_pool: Optional[KeyPool] = None,
+                             auth_header: str = "X-RapidAPI-Key") -> dict:
+    # Submit a single program and return its token with the key that accepted it.
+    # With wait=True Judge0 runs it synchronously and the finished submission is returned as "result".
+    if wait:
+        query = "&wait=true" + (f"&fields=token,{fields}" if fields else "")
+        # Judge0 holds the connection until the run finishes, allow for queueing plus execution
+        data, key = await _post_judge0_with_rotation("/submissions", payload, host, query=query, timeout=60.0,
+                                                     base_url=base_url, key_pool=key_pool, auth_header=auth_header)
+        return {"token": data.get("token"), "used_key": key, "result": data}
+    data, key = await _post_judge0_with_rotation("/submissions", payload, host, base_url=base_url,
+                                                 key_pool=key_pool, auth_header=auth_header)
+    return {"token": data.get("token"), "used_key": key}
+
+
+async def rotate_judge0_batch_keys(payloads: List[dict], host: str, base_url: Optional[str] = None,
+                                   key_pool: Optional[KeyPool] = None, auth_header: str = "X-RapidAPI-Key") -> dict:
+    # Submit several programs in one /submissions/batch request.
+    # Judge0 answers with one entry per submission: {"token": ...} or the validation errors for it.
+    data, key = await _post_judge0_with_rotation("/submissions/batch", {"submissions": payloads}, host,
+                                                 base_url=base_url, key_pool=key_pool, auth_header=auth_header)
+    return {"submissions": data, "used_key": key}
+
+
+class SingleFlight:
+    """
+    Concurrent calls with the same key share one execution and its outcome (result or exception).
+    The shared call runs in its own task, so a caller that gives up does not cancel it for the others.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._in_flight: Dict[str, asyncio.Task] = {}
+
+    async def do(self, key: str, func: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(func())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda t: self._finished(key, t))
+        else:
+            increment(f"{self.name}_requests_coalesced")
+        return await asyncio.shield(task)
+
+    def _finished(self, key: str, task: asyncio.Task) -> None:
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        # Every waiter may have gone away; don't warn about an unretrieved exception
+        if not task.cancelled():
+            task.exception()
+
+    def snapshot(self) -> dict:
+        return {"in_flight": len(self._in_flight)}
+
+
+gemini_single_flight = SingleFlight("gemini")
+register_provider("gemini_single_flight", gemini_single_flight.snapshot)
+
+
+def _is_retryable_gemini_error(exc: BaseException) -> bool:
+    # A timed out call already waited the full timeout, move to the next key instead of retrying it
+    return is_transient_error(exc) and not isinstance(exc, asyncio.TimeoutError)
 
 async def rotate_gemini_keys(prompt: str, model_name: str = "gemini-1.5-flash", timeout: int = 30) -> str: # This function rotates through the Gemini API keys and returns the response from the first key that works
     #timeout is set to 30 seconds, can be adjusted as needed
+    # Identical prompts in flight at the same time (double clicks, reruns, a class submitting the same code)
+    # share one Gemini call and its response
+    key = hashlib.sha256(f"{model_name}\0{prompt}".encode("utf-8")).hexdigest()
+    return await gemini_single_flight.do(key, lambda: _guarded_gemini_call(prompt, model_name, timeout))
+
+
+async def _guarded_gemini_call(prompt: str, model_name: str, timeout: int):
+    # While Gemini's breaker is open this raises CircuitOpenError at once; callers fall back to feedback without AI
+    async with gemini_breaker.guard(is_upstream_failure):
+        return await _generate_with_gemini_keys(prompt, model_name, timeout)
+
+
+async def _generate_with_gemini_keys(prompt: str, model_name: str, timeout: int):
     # Import the necessary modules
     from google.generativeai import configure, GenerativeModel
 
-    # Get the Gemini API keys from the environment
-    keys = get_env_keys("GEMINI_API_KEYS")
-
-    # Loop through each key
-    for key in keys:
-        try:
-            # Configure the API with the current key
-            configure(api_key=key)
-            # Create a new model with the given model name
-            model = GenerativeModel(model_name)
+    # Try the healthiest, least loaded keys first
+    for state in gemini_key_pool.candidates():
+        async with gemini_key_pool.use(state) as key:
+            try:
+                # Configure the API with the current key
+                configure(api_key=key)
+                # Create a new model with the given model name
+                model = GenerativeModel(model_name)
 
-            # enforce timeout on the model call
-            # Wait for the model to generate content with the given prompt
-            loop = asyncio.get_event_loop()  
+                # enforce timeout on the model call
+                # Wait for the model to generate content with the given prompt
+                loop = asyncio.get_running_loop()
 
-            # Run blocking Gemini SDK call inside executor with timeout
-            response = await asyncio.wait_for(
-                loop.run_in_executor(None, lambda: model.generate_content(prompt)),
-                timeout=timeout
-            )
+                # Run blocking Gemini SDK call inside executor with timeout
+                async def generate():
+                    return await asyncio.wait_for(
+                        loop.run_in_executor(None, lambda: model.generate_content(prompt)),
+                        timeout=timeout
+                    )
 
-            # If the response is valid, return it
-            if response and response.candidates:
-                return response
+                # Retry transient upstream errors (5xx, connection resets) without blocking the event loop
+                response = await retry_async(generate, max_attempts=2, retry_if=_is_retryable_gemini_error)
 
-        except asyncio.TimeoutError:
-            # Timeout fallback — try next key
-            continue
+                # If the response is valid, return it
+                if response and response.candidates:
+                    gemini_key_pool.mark_success(state)
+                    return response
+                gemini_key_pool.mark_error(state)
 
-        except Exception as e:
-            # If the exception is related to quota or exceeded, try next key
-            if "quota" in str(e).lower() or "exceeded" in str(e).lower():
+            except asyncio.TimeoutError:
+                # Timeout fallback — try next key
+                gemini_key_pool.mark_error(state)
                 continue
-            else:
-                # Otherwise, raise the exception
-                raise e
+
+            except Exception as e:
+                # If the exception is related to quota or exceeded, cool the key down and try the next one
+                if "quota" in str(e).lower() or "exceeded" in str(e).lower():
+                    gemini_key_pool.mark_rate_limited(state)
+                    continue
+                else:
+                    # Otherwise, raise the exception
+                    gemini_key_pool.mark_error(state)
+                    raise e
 
     # If all keys have been exhausted or failed, raise an exception
-    raise Exception("All Gemini keys exhausted or failed.")
+    raise KeysExhaustedError("All Gemini keys exhausted or failed.")
 
@@ -0,0 +1,24 @@
+from collections import defaultdict
+from typing import Callable, Dict
+from logging_config import logger
+
+# Simple in-process metrics: monotonic counters plus named providers that
+# report a state snapshot (key pools, caches, ...) when /metrics is read.
+_counters: Dict[str, int] = defaultdict(int)
+_providers: Dict[str, Callable[[], dict]] = {}
+
+def increment(name: str, amount: int = 1) -> None:
+    _counters[name] += amount
+
+def register_provider(name: str, provider: Callable[[], dict]) -> None:
+    _providers[name] = provider
+
+def snapshot() -> dict:
+    data = {"counters": dict(_counters)}
+    for name, provider in _providers.items():
+        try:
+            data[name] = provider()
+        except Exception as e:
+            logger.error(f"Metrics provider '{name}' failed: {e}")
+            data[name] = {"error": str(e)}
+    return data
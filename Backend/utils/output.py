@@ -0,0 +1,21 @@
+import hashlib
+import os
+
+# Largest stdout / stderr / compile output kept in an execution result, whatever the backend returns
+MAX_RESULT_OUTPUT_CHARS = int(os.getenv("MAX_RESULT_OUTPUT_CHARS", "65536"))
+# Output shown in API responses and pasted into AI prompts; the full output is represented by its hash
+RESPONSE_OUTPUT_CHARS = int(os.getenv("RESPONSE_OUTPUT_CHARS", "2000"))
+
+def truncate_output(text: str, limit: int = RESPONSE_OUTPUT_CHARS) -> str:
+    """Keep at most limit characters, noting how much was cut."""
+    text = text or ""
+    if len(text) <= limit:
+        return text
+    return f"{text[:limit]}\n... [truncated, {len(text)} characters in total]"
+
+def output_digest(text: str) -> str:
+    return hashlib.sha256((text or "").encode("utf-8", errors="replace")).hexdigest()
+
+def stdout_digest(stdout: str) -> str:
+    """Hash of the complete stdout as it is compared with expected output (surrounding whitespace ignored)."""
+    return output_digest((stdout or "").strip())
@@ -0,0 +1,79 @@
+import asyncio
+import random
+from typing import Any, Awaitable, Callable
+import httpx
+from logging_config import logger
+
+# HTTP statuses worth retrying: the upstream is overloaded or briefly unavailable.
+# 429 is deliberately absent, callers rotate to another API key instead.
+TRANSIENT_STATUS_CODES = {500, 502, 503, 504}
+
+# Failures that can succeed on a second attempt. Parse/validation errors
+# (ValueError, json.JSONDecodeError, ...) are deterministic and never retried.
+TRANSIENT_EXCEPTIONS = (
+    httpx.TimeoutException,
+    httpx.NetworkError,
+    httpx.RemoteProtocolError,
+    asyncio.TimeoutError,
+    ConnectionError,
+    TimeoutError,
+)
+
+# Failures before the request reached the server. Only these are retried for requests that
+# are not idempotent (a Judge0 submission): after a read timeout the run may already exist.
+CONNECT_EXCEPTIONS = (
+    httpx.ConnectError,
+    httpx.ConnectTimeout,
+    httpx.PoolTimeout,
+)
+
+def is_connect_error(exc: BaseException) -> bool:
+    """Return True when exc happened before the request was sent, so sending it again is safe."""
+    return isinstance(exc, CONNECT_EXCEPTIONS)
+
+def is_transient_error(exc: BaseException) -> bool:
+    """Return True when exc is a temporary failure that a retry may fix."""
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code in TRANSIENT_STATUS_CODES
+    if isinstance(exc, TRANSIENT_EXCEPTIONS):
+        return True
+    # SDK errors (e.g. google.api_core) expose the HTTP status as `code`
+    status = getattr(exc, "code", None) or getattr(exc, "status_code", None)
+    return isinstance(status, int) and status in TRANSIENT_STATUS_CODES
+
+def backoff_delay(attempt: int, base_delay: float, max_delay: float) -> float:
+    # Exponential backoff with full jitter: uniform(0, min(max_delay, base * 2^(attempt-1)))
+    return random.uniform(0, min(max_delay, base_delay * (2 ** (attempt - 1))))
+
+async def retry_async(
+    func: Callable[..., Awaitable[Any]],
+    *args,
+    max_attempts: int = 3,
+    base_delay: float = 0.5,
+    max_delay: float = 8.0,
+    retry_if: Callable[[BaseException], bool] = is_transient_error,
+    **kwargs
+) -> Any:
+    """
+    Await func(*args, **kwargs), retrying transient failures with exponential backoff
+    and jitter. Waiting uses asyncio.sleep, so other requests keep running meanwhile.
+    """
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            return await func(*args, **kwargs)
+        except Exception as e:
+            if attempt >= max_attempts or not retry_if(e):
+                if attempt > 1:
+                    logger.error(f"All {attempt} attempts failed for {getattr(func, '__name__', func)}: {e}")
+                raise
+            delay = backoff_delay(attempt, base_delay, max_delay)
+            logger.warning(f"Retry {attempt}/{max_attempts} for {getattr(func, '__name__', func)} in {delay:.2f}s due to error: {e}")
+            await asyncio.sleep(delay)
+
+async def send_checked(send: Callable[..., Awaitable[httpx.Response]], *args, **kwargs) -> httpx.Response:
+    """await send(*args, **kwargs) and raise for error statuses, so retry_async sees transient 5xx replies."""
+    response = await send(*args, **kwargs)
+    response.raise_for_status()
+    return response
@@ -2,9 +2,13 @@
 # Frontend/app.py - Updated to show recruiter feedback from Gemini and enhanced Judge0 execution details
 import streamlit as st
 import requests
+import json
 import time
 
 API_URL = "http://localhost:8000/api/v1/code-assessment"
+# Seconds between evaluation status checks, and how long to keep checking
+EVALUATION_POLL_INTERVAL = 1
+EVALUATION_POLL_TIMEOUT = 300
 
 st.set_page_config(
     page_title="AI Code Assessment - Dynamic Questions",
@@ -13,6 +17,19 @@ st.set_page_config(
     page_icon="🎯"
 )
 
+def iter_sse(response):
+    """Yield (event, data) pairs from a Server-Sent Events response."""
+    event, data = "message", []
+    for line in response.iter_lines(decode_unicode=True):
+        if not line:
+            if data:
+                yield event, json.loads("\n".join(data))
+            event, data = "message", []
+        elif line.startswith("event:"):
+            event = line[len("event:"):].strip()
+        elif line.startswith("data:"):
+            data.append(line[len("data:"):].strip())
+
 # Session state init
 if "current_question" not in st.session_state:
     st.session_state.current_question = None
@@ -22,6 +39,8 @@ if "evaluation_result" not in st.session_state:
     st.session_state.evaluation_result = None
 if "questions_generated" not in st.session_state:
     st.session_state.questions_generated = 0
+if "evaluation_job" not in st.session_state:
+    st.session_state.evaluation_job = None
 
 # Sidebar UI
 with st.sidebar:
@@ -36,6 +55,7 @@ with st.sidebar:
                 st.session_state.current_question = response.json()
                 st.session_state.user_code = ""
                 st.session_state.evaluation_result = None
+                st.session_state.evaluation_job = None
                 st.session_state.questions_generated += 1
                 st.success(f"Generated in {generation_time:.1f}s")
                 st.rerun()
@@ -86,9 +106,38 @@ if st.session_state.current_question:
                     "language_id": language_options[selected_language],
                     "question_id": question['id']
                 }
-                response = requests.post(f"{API_URL}/evaluate-code", json=data, timeout=90)
+                # The backend evaluates in the background and streams each test case as it finishes
+                response = requests.post(f"{API_URL}/evaluations", params={"stream": "true"}, json=data, timeout=10)
                 response.raise_for_status()
-                st.session_state.evaluation_result = response.json()
+                job_id = response.json()["job_id"]
+                progress = st.empty()
+                cases = {}
+                with requests.get(f"{API_URL}/evaluations/{job_id}/events", stream=True,
+                                  timeout=(10, EVALUATION_POLL_TIMEOUT)) as events:
+                    events.raise_for_status()
+                    for event, payload in iter_sse(events):
+                        if event == "test_case":
+                            cases[payload["index"]] = payload
+                            icons = {"queued": "⏳", "running": "▶️", "skipped": "⏭️"}
+                            progress.markdown("\n".join(
+                                f"- Test Case #{idx + 1}: " + (
+                                    ("✅ Passed" if case["result"]["status"] == "Passed" else "❌ Failed")
+                                    if case["status"] == "finished"
+                                    else f"{icons.get(case['status'], '')} {case['status'].capitalize()}"
+                                )
+                                for idx, case in sorted(cases.items())
+                            ))
+                        # Test results arrive first, the recruiter feedback follows on the same job
+                        elif event == "result":
+                            st.session_state.evaluation_result = payload
+                            st.session_state.evaluation_job = {"job_id": job_id, "feedback_status": "pending"}
+                            break
+                        elif event == "done":
+                            if payload["status"] == "failed":
+                                raise RuntimeError(payload.get("error") or "Evaluation failed")
+                            st.session_state.evaluation_result = payload["result"]
+                            st.session_state.evaluation_job = payload
+                            break
                 st.rerun()
         except Exception as e:
             st.error(f"Submission error: {e}")
@@ -128,6 +177,23 @@ if st.session_state.current_question:
                         st.code(res["error"], language="python")
 
         with tab3:
+            job = st.session_state.evaluation_job
+            if job and job.get("feedback_status") == "pending":
+                with st.spinner("🧠 Generating recruiter feedback..."):
+                    deadline = time.time() + EVALUATION_POLL_TIMEOUT
+                    while job.get("feedback_status") == "pending" and time.time() < deadline:
+                        time.sleep(EVALUATION_POLL_INTERVAL)
+                        try:
+                            response = requests.get(f"{API_URL}/evaluations/{job['job_id']}", timeout=10)
+                            response.raise_for_status()
+                            job = response.json()
+                        except Exception as e:
+                            st.error(f"Feedback error: {e}")
+                            break
+                st.session_state.evaluation_job = job
+                if job.get("result"):
+                    st.session_state.evaluation_result = job["result"]
+                    result = job["result"]
             fb = result.get("feedback", {})
             if not fb:
                 st.info("No recruiter feedback available.")